@@ -34,7 +34,10 @@ Example:
     >>> slots = table.get_slot_mapping([0, 1], [5, 10])
 """
 
+from collections.abc import Sequence
+
 import jax
+import numpy as np
 from jax import numpy as jnp
 
 from easydel.utils.helpers import get_logger
@@ -115,14 +118,14 @@ class PageTable:
         self.num_pages_per_row = jnp.zeros(max_num_reqs, dtype=jnp.int32)
         self.slot_mapping = jnp.full(self.max_num_batched_tokens, fill_value=SLOT_MAPPING_PADDING_VAL, dtype=jnp.int32)
 
-    def append_row(self, page_ids: list[int], row_idx: int) -> None:
+    def append_row(self, page_ids: Sequence[int], row_idx: int) -> None:
         """Append page IDs to a row.
 
         Args:
-            page_ids: List of page IDs to append.
+            page_ids: Page IDs to append.
             row_idx: Row index to append to.
         """
-        if not page_ids:
+        if len(page_ids) == 0:
             return
         num_pages = len(page_ids)
         start = int(self.num_pages_per_row[row_idx])
@@ -130,7 +133,26 @@ class PageTable:
         self.page_table = self.page_table.at[row_idx, start : start + num_pages].set(page_ids_array)
         self.num_pages_per_row = self.num_pages_per_row.at[row_idx].set(self.num_pages_per_row[row_idx] + num_pages)
 
-    def add_row(self, page_ids: list[int], row_idx: int) -> None:
+    def append_rows_batch(self, row_indices: Sequence[int], page_ids: Sequence[Sequence[int]]) -> None:
+        """Append page IDs to several rows with a single scatter.
+
+        Args:
+            row_indices: Distinct row indices to append to.
+            page_ids: Page IDs to append, one sequence per row.
+        """
+        rows = [row for row, ids in zip(row_indices, page_ids, strict=True) if len(ids)]
+        if not rows:
+            return
+        flat_ids = np.concatenate([np.asarray(ids, dtype=np.int32) for ids in page_ids if len(ids)])
+        lens = np.array([len(ids) for ids in page_ids if len(ids)], dtype=np.int32)
+        rows = np.asarray(rows, dtype=np.int32)
+        starts = np.asarray(self.num_pages_per_row)[rows]
+        # column of every appended id: its row's current length plus its offset within the row
+        cols = np.arange(flat_ids.size, dtype=np.int32) + np.repeat(starts - (np.cumsum(lens) - lens), lens)
+        self.page_table = self.page_table.at[np.repeat(rows, lens), cols].set(flat_ids)
+        self.num_pages_per_row = self.num_pages_per_row.at[rows].add(lens)
+
+    def add_row(self, page_ids: Sequence[int], row_idx: int) -> None:
         self.num_pages_per_row = self.num_pages_per_row.at[row_idx].set(0)
         self.append_row(page_ids, row_idx)
 
@@ -193,11 +215,15 @@ class MultiGroupPageTable:
             for page_size in page_sizes
         ]
 
-    def append_row(self, page_ids: tuple[list[int], ...], row_idx: int) -> None:
+    def append_row(self, page_ids: tuple[Sequence[int], ...], row_idx: int) -> None:
         for i, page_table in enumerate(self.page_tables):
             page_table.append_row(page_ids[i], row_idx)
 
-    def add_row(self, page_ids: tuple[list[int], ...], row_idx: int) -> None:
+    def append_rows_batch(self, row_indices: Sequence[int], page_ids: Sequence[tuple[Sequence[int], ...]]) -> None:
+        for i, page_table in enumerate(self.page_tables):
+            page_table.append_rows_batch(row_indices, [ids[i] for ids in page_ids])
+
+    def add_row(self, page_ids: tuple[Sequence[int], ...], row_idx: int) -> None:
         for i, page_table in enumerate(self.page_tables):
             page_table.add_row(page_ids[i], row_idx)
 
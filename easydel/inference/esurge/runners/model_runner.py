@@ -58,11 +58,17 @@ Example:
 
 from __future__ import annotations
 
+import bisect
+import functools
+import heapq
+import os
 import time
 import typing
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from typing import cast
 
 import jax
+import numpy as np
 from eformer import escale as es
 from flax import nnx as nn
 from jax import numpy as jnp
@@ -84,6 +90,10 @@ if typing.TYPE_CHECKING:
 
 logger = get_logger("eSurge")
 
+# Every in-flight AOT compilation holds a full-model lowered module (and XLA's working
+# memory) on the host, so parallel compilation is kept narrow by default.
+_DEFAULT_COMPILE_WORKERS = 2
+
 
 class ExecutorManager:
     """Manages precompiled execution functions for efficient model inference.
@@ -94,10 +104,12 @@ class ExecutorManager:
     - Separate functions: Separate functions for hidden states and token generation
 
     The manager supports both AOT (Ahead-of-Time) and JIT (Just-In-Time) compilation:
-    - AOT mode (default): Pre-compiles functions using JAX's lower/compile API for
-      optimal performance in production
-    - JIT mode: Compiles functions on first use with graph definition as static
-      argument, more flexible for development
+    - AOT mode (default): Pre-compiles functions using JAX's lower/compile API
+      without executing them
+    - JIT mode: Compiles functions by running them once on example inputs
+
+    In both modes runtime dispatch goes through the jitted callables with the
+    graph definition as static argument, reusing the warmed-up executables.
 
     The manager pre-compiles functions for various configurations to avoid
     runtime compilation overhead, enabling seamless switching between different
@@ -111,6 +123,7 @@ class ExecutorManager:
         use_aot_forward: Whether to use AOT compilation (default: True).
         graphdef, graphstate, graphother: Split model components for JAX.
         _lowerd_history: Cache of compiled functions.
+        _exec_table: Dispatch table of compiled functions indexed by (token bucket, request bucket).
 
     Example:
         >>> executor = ExecutorManager(
@@ -131,6 +144,14 @@ class ExecutorManager:
         kv_pages: PagesCache,
         use_combined_forward: bool = False,
         use_aot_forward: bool = True,
+        min_input_pad: int = 8,
+        num_reqs_bucket_knee: int | None = None,
+        num_reqs_bucket_stride: int = 16,
+        rng_pool_size: int = 128,
+        sample_dtype: jnp.dtype | None = None,
+        large_batch_top_p_k: int | None = None,
+        compile_cache_dir: str | os.PathLike | None = None,
+        max_num_reqs: int | None = None,
     ):
         """Initialize the executor manager.
 
@@ -140,29 +161,82 @@ class ExecutorManager:
             kv_pages: Pages cache for KV cache management.
             use_combined_forward: Whether to use combined forward pass for model and token
                 generation in a single function call. Default is False.
-            use_aot_forward: Whether to use Ahead-of-Time (AOT) compilation for model
-                execution. When True (default), functions are pre-compiled for better
-                performance. When False, uses Just-In-Time (JIT) compilation with
-                the graph definition passed as a static argument.
+            use_aot_forward: Whether to use Ahead-of-Time (AOT) compilation to warm
+                up the execution functions. When True (default), functions are
+                lowered and compiled without being executed. When False, functions
+                are compiled by running them once on example inputs.
+            min_input_pad: Smallest padded request count.
+            num_reqs_bucket_knee: Request counts up to this value are padded to the next
+                power of two; larger counts are padded to multiples of `num_reqs_bucket_stride`.
+                Must be a power of two no smaller than `min_input_pad`. None (default) pads
+                every count to a power of two.
+            num_reqs_bucket_stride: Padding stride for request counts above the knee.
+            rng_pool_size: Number of decode steps served by one pre-split pool of
+                sampling keys before it is refilled.
+            sample_dtype: Opt-in dtype the LM-head logits are cast to before sampling.
+                A 16-bit dtype halves the traffic of the sampling sort, but it changes
+                sampling numerics: bfloat16 keeps only 8 mantissa bits, so nearby logits
+                of a large vocabulary tie or reorder, which can move the argmax and the
+                top-p boundary. None (default) keeps the LM-head output dtype.
+            large_batch_top_p_k: Opt-in smaller top-p candidate set for request buckets of
+                `_LARGE_BATCH_MIN_REQS` or more. This makes the nucleus a request samples from
+                depend on how many requests share its batch, so it is off by default
+                (None keeps the default k of 64 for every bucket).
+            compile_cache_dir: Directory for JAX's persistent compilation cache. When set,
+                executables compiled by `compile` are written there and later processes
+                load them from disk instead of invoking XLA again. This sets the
+                process-global `jax_compilation_cache_dir`, so every other jit in the
+                process uses it too; a cache directory the user already configured is
+                kept and this argument is ignored with a warning.
+            max_num_reqs: Maximum number of concurrent requests. When given, the pool of
+                sampling keys is allocated here so `execute` works before `compile`;
+                otherwise it is allocated by `compile`.
         """
         logger.info(f"Initializing ExecutorManager with use_combined_forward={use_combined_forward}")
+        _check_num_reqs_bucket_knee(num_reqs_bucket_knee, min_input_pad)
         self.model = model
         self.mesh = mesh
         self.kv_pages = kv_pages
         self.use_combined_forward = use_combined_forward
         self.use_aot_forward = use_aot_forward
+        self.min_input_pad = min_input_pad
+        self.num_reqs_bucket_knee = num_reqs_bucket_knee
+        self.num_reqs_bucket_stride = num_reqs_bucket_stride
         logger.debug("Splitting model module for graph-based execution")
         self.graphdef, self.graphstate, self.graphother = model.split_module()
 
         self.rng_key = jax.random.PRNGKey(0)
+        self.rng_pool_size = rng_pool_size
+        self.sample_dtype = sample_dtype
+        self.large_batch_top_p_k = large_batch_top_p_k
+        # top_p / temperature are stored in the dtype the sampler sees, so the in-graph
+        # cast in `_sample_top_p` is a no-op on the hot path.
+        self.sampling_params_dtype = sample_dtype if sample_dtype is not None else self._lm_head_dtype()
+        self.compile_cache_dir = compile_cache_dir
+        self._key_pool: jax.Array | None = None
+        self._key_pool_index = 0
 
         self._empty_sharding = jax.NamedSharding(mesh, jax.sharding.PartitionSpec())
-
-        self._main_fn: None | pjit.JitWrapped = None
+        # Extracted once and shared by every jitted function so they all see the same sharding pytrees.
+        self._state_sh = es.extract_shardings(self.graphstate, self.mesh)
+        self._other_sh = es.extract_shardings(self.graphother, self.mesh)
+        self._kv_sh = es.extract_shardings(self.kv_pages, self.mesh)
+        if max_num_reqs is not None:
+            self._refill_key_pool(max_num_reqs)
+
+        # Sampling functions are specialized on the static top-k used by the sampler,
+        # so they are kept per `top_p_k` (see `_get_top_p_k`).
+        self._main_fns: dict[int, pjit.JitWrapped] = {}
         self._compute_hidden_states_fn: None | pjit.JitWrapped = None
-        self._compute_tokens_fn: None | pjit.JitWrapped = None
+        self._compute_tokens_fns: dict[int, pjit.JitWrapped] = {}
 
         self._lowerd_history = dict()
+        self._tok_bucket: dict[int, int] = {}
+        self._req_bucket: dict[int, int] = {}
+        self._exec_table: list[list[typing.Any]] = []
+        self._compile_buffers: dict[str, jax.Array] | None = None
+        self._metadata_cache: dict[tuple[int, int, int, int], PagesMetadata] = {}
+        self._arange_cache: dict[int, jax.Array] = {}
 
         logger.debug("Initializing execution functions")
         self.init_fns()
@@ -182,10 +256,14 @@ class ExecutorManager:
         Selects and runs the appropriate pre-compiled function based on
         input shapes. Handles both combined and separate execution modes.
 
-        When AOT compilation is disabled (use_aot_forward=False), the graph
-        definition is passed as a static argument during execution for JIT
-        compilation. When enabled (default), pre-compiled functions are used
-        for better performance.
+        The dispatch table holds the jitted functions with the graph definition
+        pre-bound as their static argument, so every call goes through JAX's C++
+        dispatch path and hits the executable that was warmed up during `compile`.
+
+        `self.kv_pages` is the only reference to the cache pages, and it is
+        passed straight into the call and rebound to the returned pages in the
+        same statement. No other binding keeps the donated buffers alive, so XLA
+        updates the pages in place rather than allocating a second copy.
 
         Args:
             input_ids_view: Token IDs to process [num_tokens].
@@ -196,15 +274,13 @@ class ExecutorManager:
             padded_num_reqs: Padded number of requests.
 
         Returns:
-            tuple: (sampled_token_ids, logits or None)
+            tuple: (sampled_token_ids, None)
                 - sampled_token_ids: Generated token IDs.
-                - logits: Raw logits (only in separate mode).
+                - None: Logits are not returned by either execution mode.
         """
-        static_arguments = (self.graphdef,) if not self.use_aot_forward else ()
         if self.use_combined_forward:
             fn = self.get_compiled_key(input_ids_view.shape[0], padded_num_reqs)
-            token_ids, self.kv_pages, self.rng_key = fn(
-                *static_arguments,
+            token_ids, self.kv_pages = fn(
                 self.graphstate,
                 self.graphother,
                 input_ids_view,
@@ -213,30 +289,28 @@ class ExecutorManager:
                 cache_metadata,
                 logits_indices,
                 sampling_metadata,
-                self.rng_key,
+                self._next_rng_keys(),
             )
             return token_ids, None
         else:
             hfn, tfn = self.get_compiled_key(input_ids_view.shape[0], padded_num_reqs)
             hidden_states, self.kv_pages = hfn(
-                *static_arguments,
                 self.graphstate,
                 self.graphother,
                 input_ids_view,
                 position_ids_view,
                 self.kv_pages,
                 cache_metadata,
+                logits_indices,
             )
-            token_ids, self.rng_key = tfn(
-                *static_arguments,
+            token_ids = tfn(
                 self.graphstate,
                 self.graphother,
                 hidden_states,
-                logits_indices,
                 sampling_metadata,
-                self.rng_key,
+                self._next_rng_keys(),
             )
-            return token_ids, token_ids
+            return token_ids, None
 
     def compile(
         self,
@@ -245,21 +319,100 @@ class ExecutorManager:
         max_pages_per_req: int,
         max_num_reqs: int,
         metadata: PagesCacheMetaData,
+        max_workers: int | None = None,
     ):
+        """Compile the execution functions for every reachable (num_tokens, padded_num_reqs) pair.
+
+        In AOT mode, functions are lowered on the calling thread and the XLA
+        compilations (which release the GIL) run concurrently on a thread pool.
+        JIT mode executes the functions and therefore compiles serially.
+
+        Args:
+            num_tokens_paddings: Token padding sizes to compile for.
+            num_reqs_max_model_len: Number of requests for max model length.
+            max_pages_per_req: Maximum pages per request.
+            max_num_reqs: Maximum number of requests.
+            metadata: Pages cache metadata.
+            max_workers: Number of concurrent AOT compilations, which also bounds how many
+                lowered modules are held in host memory at once. Defaults to
+                `_DEFAULT_COMPILE_WORKERS`; 1 compiles serially.
+        """
         logger.debug(f"Starting compilation for {len(num_tokens_paddings)} token padding sizes")
         logger.debug(f"Token paddings: {num_tokens_paddings}")
         logger.debug(f"Max pages per request: {max_pages_per_req}, Max requests: {max_num_reqs}")
+        if self.compile_cache_dir is not None:
+            self._enable_persistent_compilation_cache()
+        self._refill_key_pool(max_num_reqs)
+        if not self.use_aot_forward:
+            self._compile_buffers = self._build_compile_buffers(
+                max(num_tokens_paddings),
+                num_reqs_max_model_len,
+                max_pages_per_req,
+                max_num_reqs,
+                metadata,
+            )
 
-        ufn = _get_padded_num_reqs_with_upper_limit
-        reqs_padds = list(set([ufn(num_reqs, max_num_reqs) for num_reqs in range(max_num_reqs)]))
-        total_compilations = len(num_tokens_paddings) * len(reqs_padds)
+        reqs_padds = _enumerate_padded_num_reqs(
+            max_num_reqs,
+            self.min_input_pad,
+            self.num_reqs_bucket_knee,
+            self.num_reqs_bucket_stride,
+        )
+        compile_pairs = _reachable_bucket_pairs(
+            num_tokens_paddings,
+            max_num_reqs,
+            self.min_input_pad,
+            self.num_reqs_bucket_knee,
+            self.num_reqs_bucket_stride,
+        )
+        total_compilations = len(compile_pairs)
         compilation_count = 0
+        if max_workers is None:
+            max_workers = min(_DEFAULT_COMPILE_WORKERS, os.cpu_count() or 1)
 
         # Use the new ProgressLogger
         progress = ProgressLogger("eSurge", logger)
 
-        for num_tokens in num_tokens_paddings:
-            for reqs_padd in reqs_padds:
+        if self.use_aot_forward and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="esurge-compile") as pool:
+                pending = {}
+                submitted_keys: set[tuple] = set()
+
+                def _collect(done):
+                    nonlocal compilation_count
+                    for future in done:
+                        num_tokens, reqs_padd = pending.pop(future)
+                        for key, fn in future.result():
+                            self._lowerd_history[key] = fn
+                        compilation_count += 1
+                        progress.update(
+                            compilation_count,
+                            total_compilations,
+                            f"Compiled [{compilation_count}/{total_compilations}]:"
+                            f" {num_tokens:5d} tokens, {reqs_padd:2d} padded requests",
+                        )
+
+                for num_tokens, reqs_padd in compile_pairs:
+                    # Only lower as far ahead as there are workers, so at most `max_workers`
+                    # lowered modules are held in host memory at once.
+                    if len(pending) >= max_workers:
+                        _collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                    # Tracing/lowering touches shared Python state, so it stays on this thread.
+                    entries = self._step_lower(
+                        num_tokens=num_tokens,
+                        num_reqs_max_model_len=num_reqs_max_model_len,
+                        max_pages_per_req=max_pages_per_req,
+                        max_num_reqs=max_num_reqs,
+                        padded_num_reqs=reqs_padd,
+                        metadata=metadata,
+                        skip_keys=submitted_keys,
+                    )
+                    submitted_keys.update(key for key, _, _ in entries)
+                    pending[pool.submit(self._compile_entries, entries)] = (num_tokens, reqs_padd)
+
+                _collect(as_completed(list(pending)))
+        else:
+            for num_tokens, reqs_padd in compile_pairs:
                 compile_start = time.time()
 
                 # Update progress
@@ -283,6 +436,158 @@ class ExecutorManager:
 
         # Complete the progress
         progress.complete(f"All {total_compilations} compilations completed")
+        self._compile_buffers = None
+        self._metadata_cache.clear()
+        self._build_exec_table(num_tokens_paddings, reqs_padds)
+
+    def _build_exec_table(self, num_tokens_paddings: list[int], reqs_padds: list[int]):
+        """Index the compiled functions by bucket so `get_compiled_key` avoids tuple hashing.
+
+        Every padded token count and padded request count is mapped to a small
+        integer, and the functions compiled for each pair are stored in a
+        `[n_tok_buckets][n_req_buckets]` table. Pairs that were never compiled
+        hold None.
+
+        The stored callables have the (immutable) graph definition pre-bound as
+        their static first argument, so `execute` does not pass it every step.
+        The underlying jits keep `static_argnums=(0,)`, which means graphdef
+        still takes part in their cache key.
+        """
+        bound: dict[int, functools.partial] = {}
+
+        def bind(fn):
+            if fn is None:
+                return None
+            if id(fn) not in bound:
+                bound[id(fn)] = functools.partial(fn, self.graphdef)
+            return bound[id(fn)]
+
+        tok_padds = sorted(set(num_tokens_paddings))
+        self._tok_bucket = {num_tokens: idx for idx, num_tokens in enumerate(tok_padds)}
+        self._req_bucket = {reqs_padd: idx for idx, reqs_padd in enumerate(reqs_padds)}
+        table: list[list[typing.Any]] = [[None] * len(reqs_padds) for _ in tok_padds]
+        for num_tokens, tok_idx in self._tok_bucket.items():
+            for reqs_padd, req_idx in self._req_bucket.items():
+                if self.use_combined_forward:
+                    table[tok_idx][req_idx] = bind(self._lowerd_history.get((num_tokens, reqs_padd)))
+                else:
+                    hfn = self._lowerd_history.get((num_tokens, reqs_padd, "hidden_states"))
+                    tfn = self._lowerd_history.get((reqs_padd, "tokens"))
+                    if hfn is not None and tfn is not None:
+                        table[tok_idx][req_idx] = (bind(hfn), bind(tfn))
+        self._exec_table = table
+
+    def _enable_persistent_compilation_cache(self):
+        """Route JAX's persistent compilation cache to `compile_cache_dir`.
+
+        JAX keys cache entries on the HLO fingerprint, device assignment, compile
+        options and jax/jaxlib versions, which covers the model architecture, the
+        (num_tokens, padded_num_reqs) shapes and the mesh. The executor keeps
+        dispatching through its jitted callables; they transparently load the
+        persisted executables on a cache hit.
+
+        The cache directory is process-global. One the user already configured
+        is left in place (with a warning when it differs); only `ejit`'s default
+        directory is replaced. The cache is only reset when the directory actually
+        changes. Which executables are persisted still follows the user's
+        `jax_persistent_cache_min_compile_time_secs`.
+        """
+        from jax.experimental.compilation_cache import compilation_cache as cc
+
+        from easydel.utils.compiling_utils import COMPILE_FUNC_DIR
+
+        cache_dir = os.path.abspath(os.fspath(self.compile_cache_dir))
+        current_dir = jax.config.jax_compilation_cache_dir
+        if current_dir:
+            current_dir = os.path.abspath(current_dir)
+            if current_dir == cache_dir:
+                return
+            if current_dir != os.path.abspath(COMPILE_FUNC_DIR):
+                logger.warning(
+                    f"JAX compilation cache is already set to {current_dir}; "
+                    f"keeping it and ignoring compile_cache_dir={cache_dir}"
+                )
+                return
+        os.makedirs(cache_dir, exist_ok=True)
+        logger.info(f"Using persistent compilation cache at {cache_dir}")
+        jax.config.update("jax_compilation_cache_dir", cache_dir)
+        cc.reset_cache()
+
+    def _lm_head_dtype(self) -> jnp.dtype:
+        """Dtype of the LM-head logits, found by tracing the head on an abstract hidden state."""
+        hidden_size = self.model.config.get_text_config().hidden_size
+        hidden_states = jax.ShapeDtypeStruct((1, hidden_size), self.model.dtype)
+        with self.model.mesh:
+            return jax.eval_shape(self.model.apply_lm_head, hidden_states).dtype
+
+    def _arange(self, n: int) -> jax.Array:
+        """Return a cached device-resident `arange(n)` int32 vector."""
+        arange = self._arange_cache.get(n)
+        if arange is None:
+            arange = jax.device_put(np.arange(n, dtype=np.int32), self._empty_sharding)
+            self._arange_cache[n] = arange
+        return arange
+
+    def _refill_key_pool(self, max_num_reqs: int | None = None):
+        """Pre-split `rng_pool_size` steps worth of per-request sampling keys.
+
+        The split runs once per pool instead of once per decode step inside the
+        compiled functions, which then only index their rows out of the pool entry.
+        """
+        if max_num_reqs is None:
+            if self._key_pool is None:
+                raise RuntimeError(
+                    "The sampling key pool is not allocated; pass `max_num_reqs` to ExecutorManager "
+                    "or call `compile` before `execute`."
+                )
+            max_num_reqs = self._key_pool.shape[1]
+        self.rng_key, pool_key = jax.random.split(self.rng_key)
+        keys = jax.random.split(pool_key, self.rng_pool_size * max_num_reqs)
+        self._key_pool = jax.device_put(
+            keys.reshape(self.rng_pool_size, max_num_reqs, *keys.shape[1:]),
+            self._empty_sharding,
+        )
+        self._key_pool_index = 0
+
+    def _next_rng_keys(self) -> jax.Array:
+        """Return the [max_num_reqs, ...] sampling keys for the next step."""
+        if self._key_pool is None or self._key_pool_index >= self.rng_pool_size:
+            self._refill_key_pool()
+        keys = self._key_pool[self._key_pool_index]
+        self._key_pool_index += 1
+        return keys
+
+    def _step_lower(
+        self,
+        num_tokens: int,
+        num_reqs_max_model_len: int,
+        max_pages_per_req: int,
+        max_num_reqs: int,
+        padded_num_reqs: int,
+        metadata: PagesCacheMetaData,
+        skip_keys: set[tuple] | frozenset = frozenset(),
+    ) -> list[tuple[tuple, pjit.JitWrapped, typing.Any]]:
+        """Lower (without compiling) a single step configuration."""
+        compargs = self._step_compargs(
+            num_tokens,
+            num_reqs_max_model_len,
+            max_pages_per_req,
+            max_num_reqs,
+            padded_num_reqs,
+            metadata,
+        )
+        return self.lower_key(num_tokens, padded_num_reqs, compargs, skip_keys)
+
+    @staticmethod
+    def _compile_entries(
+        entries: list[tuple[tuple, pjit.JitWrapped, typing.Any]],
+    ) -> list[tuple[tuple, pjit.JitWrapped]]:
+        """Compile lowered entries; runs on a worker thread."""
+        results = []
+        for key, fn, lowered in entries:
+            lowered.compile()
+            results.append((key, fn))
+        return results
 
     def _step_compile(
         self,
@@ -294,9 +599,7 @@ class ExecutorManager:
         metadata: PagesCacheMetaData,
     ) -> bool:
         """Compile a single step configuration."""
-        compargs = self.get_compile_configurations(
-            self.kv_pages,
-            self.rng_key,
+        compargs = self._step_compargs(
             num_tokens,
             num_reqs_max_model_len,
             max_pages_per_req,
@@ -306,24 +609,63 @@ class ExecutorManager:
         )
         self.compile_key(num_tokens, padded_num_reqs, compargs)
 
+    def _step_compargs(
+        self,
+        num_tokens: int,
+        num_reqs_max_model_len: int,
+        max_pages_per_req: int,
+        max_num_reqs: int,
+        padded_num_reqs: int,
+        metadata: PagesCacheMetaData,
+    ):
+        """Build the example arguments for a single step configuration."""
+        rng_keys = self._key_pool[0]
+        if self.use_aot_forward:
+            rng_keys = jax.ShapeDtypeStruct(rng_keys.shape, rng_keys.dtype, sharding=self._empty_sharding)
+        return self.get_compile_configurations(
+            self.kv_pages,
+            rng_keys,
+            num_tokens,
+            num_reqs_max_model_len,
+            max_pages_per_req,
+            max_num_reqs,
+            padded_num_reqs,
+            metadata,
+        )
+
     def init_fns(self):
-        self._main_fn = self.get_fn()
+        self._main_fns = {}
         self._compute_hidden_states_fn = self.get_compute_hidden_states_fn()
-        self._compute_tokens_fn = self.get_compute_tokens_fn()
+        self._compute_tokens_fns = {}
+
+    def get_main_fn(self, padded_num_reqs: int) -> pjit.JitWrapped:
+        """Return the combined forward function specialized for this request bucket."""
+        top_p_k = _get_top_p_k(padded_num_reqs, self.large_batch_top_p_k)
+        if top_p_k not in self._main_fns:
+            self._main_fns[top_p_k] = self.get_fn(top_p_k)
+        return self._main_fns[top_p_k]
+
+    def get_tokens_fn(self, padded_num_reqs: int) -> pjit.JitWrapped:
+        """Return the token sampling function specialized for this request bucket."""
+        top_p_k = _get_top_p_k(padded_num_reqs, self.large_batch_top_p_k)
+        if top_p_k not in self._compute_tokens_fns:
+            self._compute_tokens_fns[top_p_k] = self.get_compute_tokens_fn(top_p_k)
+        return self._compute_tokens_fns[top_p_k]
 
     def get_compute_hidden_states_fn(self) -> typing.Callable:
         @ejit(
             static_argnums=(0,),
             donate_argnames=["input_ids", "position_ids", "kv_pages"],
             in_shardings=(
-                es.extract_shardings(self.graphstate, self.mesh),
-                es.extract_shardings(self.graphother, self.mesh),
+                self._state_sh,
+                self._other_sh,
                 self._empty_sharding,  # input_ids
                 self._empty_sharding,  # position_ids
-                es.extract_shardings(self.kv_pages, self.mesh),  # kv_pages
+                self._kv_sh,  # kv_pages
                 self._empty_sharding,  # cache_metadata
+                self._empty_sharding,  # logits_indices
             ),
-            out_shardings=(self._empty_sharding, es.extract_shardings(self.kv_pages, self.mesh)),
+            out_shardings=(self._empty_sharding, self._kv_sh),
         )
         def _fn(
             graphdef,
@@ -333,78 +675,77 @@ class ExecutorManager:
             position_ids: jax.Array,
             kv_pages: PagesCache,
             cache_metadata: PagesMetadata,
+            logits_indices: jax.Array,
         ):
             model: EasyDeLBaseModule = nn.merge(graphdef, graphstate, graphother)
             with model.mesh:
                 output = model(
-                    input_ids=jnp.expand_dims(input_ids, 0),
-                    position_ids=jnp.expand_dims(position_ids, 0),
+                    input_ids=input_ids[None, :],
+                    position_ids=position_ids[None, :],
                     past_key_values=kv_pages,
                     cache_metadata=cache_metadata,
                     apply_lm_head=False,
                 )
-                return output.last_hidden_state.squeeze(0), output.past_key_values
+                # Gather the rows that need logits here so only [padded_num_reqs, hidden]
+                # is handed over to the tokens function instead of [num_tokens, hidden].
+                return output.last_hidden_state[0, logits_indices], output.past_key_values
 
         return _fn
 
-    def get_compute_tokens_fn(self) -> typing.Callable:
+    def get_compute_tokens_fn(self, top_p_k: int = 64) -> typing.Callable:
+        sample_dtype = self.sample_dtype
+
         @ejit(
             static_argnums=(0,),
             in_shardings=(
-                es.extract_shardings(self.graphstate, self.mesh),
-                es.extract_shardings(self.graphother, self.mesh),
+                self._state_sh,
+                self._other_sh,
                 self._empty_sharding,  # hidden_states
-                self._empty_sharding,  # logits_indices
                 self._empty_sharding,  # sampling_params
-                self._empty_sharding,  # rng_key
+                self._empty_sharding,  # rng_keys
             ),
-            out_shardings=(self._empty_sharding, self._empty_sharding),
+            out_shardings=self._empty_sharding,
         )
         def _fn(
             graphdef,
             graphstate,
             graphother,
             hidden_states: jax.Array,
-            logits_indices: jax.Array,
             sampling_params: ModelRunnerSamplingMetadata,
-            rng_key: jax.random.PRNGKey,
+            rng_keys: jax.Array,
         ):
             model: EasyDeLBaseModule = nn.merge(graphdef, graphstate, graphother)
             with model.mesh:
-                logits = model.apply_lm_head(hidden_states[logits_indices])
-                keys = jax.random.split(rng_key, logits.shape[0] + 1)
-                samples = jax.vmap(sample_top_p_efficient, in_axes=(0, 0, 0, 0, None), out_axes=0)(
-                    logits,
-                    sampling_params.top_p.astype(logits.dtype),
-                    sampling_params.temperature.astype(logits.dtype),
-                    keys[1:],
-                    64,
-                )
-                return samples.reshape(-1, 1), keys[0]
+                logits = model.apply_lm_head(hidden_states)
+                return _sample_top_p(logits, sampling_params, rng_keys, top_p_k, sample_dtype)
 
         return _fn
 
-    def get_fn(self) -> typing.Callable:
-        """Precompile the forward pass and token computation function."""
+    def get_fn(self, top_p_k: int = 64) -> typing.Callable:
+        """Precompile the forward pass and token computation function.
+
+        Args:
+            top_p_k: Number of top logits the top-p sampler sorts; baked into the executable.
+        """
+        sample_dtype = self.sample_dtype
 
         @ejit(
             static_argnums=(0,),
             donate_argnames=["input_ids", "position_ids", "kv_pages"],
             in_shardings=(
-                es.extract_shardings(self.graphstate, self.mesh),
-                es.extract_shardings(self.graphother, self.mesh),
+                self._state_sh,
+                self._other_sh,
                 self._empty_sharding,  # input_ids
                 self._empty_sharding,  # position_ids
-                es.extract_shardings(self.kv_pages, self.mesh),  # kv_pages
+                self._kv_sh,  # kv_pages
                 self._empty_sharding,  # cache_metadata
                 self._empty_sharding,  # logits_indices
                 self._empty_sharding,  # sampling_params
-                self._empty_sharding,  # rng_key
+                self._empty_sharding,  # rng_keys
             ),
             out_shardings=(
                 self._empty_sharding,
-                es.extract_shardings(self.kv_pages, self.mesh),
-                self._empty_sharding,
+                self._kv_sh,
             ),
         )
         def _fn(
@@ -417,32 +758,20 @@ class ExecutorManager:
             cache_metadata: PagesMetadata,
             logits_indices: jax.Array,
             sampling_params: ModelRunnerSamplingMetadata,
-            rng_key: jax.random.PRNGKey,
+            rng_keys: jax.Array,
         ):
             model: EasyDeLBaseModule = nn.merge(graphdef, graphstate, graphother)
             with model.mesh:
                 output = model(
-                    input_ids=jnp.expand_dims(input_ids, 0),
-                    position_ids=jnp.expand_dims(position_ids, 0),
+                    input_ids=input_ids[None, :],
+                    position_ids=position_ids[None, :],
                     past_key_values=kv_pages,
                     cache_metadata=cache_metadata,
                     apply_lm_head=False,
                 )
-                logits = model.apply_lm_head(output.last_hidden_state.squeeze(0)[logits_indices])
-                keys = jax.random.split(rng_key, logits.shape[0] + 1)
-
-                samples = jax.vmap(
-                    sample_top_p_efficient,
-                    in_axes=(0, 0, 0, 0, None),
-                    out_axes=0,
-                )(
-                    logits,
-                    sampling_params.top_p.astype(logits.dtype),
-                    sampling_params.temperature.astype(logits.dtype),
-                    keys[1:],
-                    64,
-                )
-                return samples.reshape(-1, 1), output.past_key_values, keys[0]
+                logits = model.apply_lm_head(output.last_hidden_state[0, logits_indices])
+                samples = _sample_top_p(logits, sampling_params, rng_keys, top_p_k, sample_dtype)
+                return samples, output.past_key_values
 
         return _fn
 
@@ -451,8 +780,11 @@ class ExecutorManager:
 
         Handles both AOT and JIT compilation modes based on use_aot_forward flag.
         For AOT mode (default), pre-compiles functions using JAX's lower/compile API.
-        For JIT mode, executes functions once to trigger JIT compilation and caches
-        the wrapped functions.
+        For JIT mode, executes functions once to trigger JIT compilation.
+
+        In both modes the jit-wrapped functions (not the `Compiled` executables)
+        are cached, so runtime dispatch goes through the jit's shape-keyed cache
+        which is cheaper per call than invoking a `Compiled` object directly.
 
         Args:
             num_tokens: Number of tokens in the input batch.
@@ -460,64 +792,90 @@ class ExecutorManager:
             compargs: Compilation arguments for the model functions.
         """
         if self.use_aot_forward:
-            if self.use_combined_forward:
-                logger.debug(f"Compiling combined forward function for key ({num_tokens}, {padded_num_reqs})")
-                lowered = self._main_fn.lower(*compargs)
-                compiled = lowered.compile()
-                self._lowerd_history[(num_tokens, padded_num_reqs)] = compiled
-            else:
-                hskey = (num_tokens, padded_num_reqs, "hidden_states")
-                tskey = (num_tokens, padded_num_reqs, "tokens")
-                if hskey not in self._lowerd_history.keys():
-                    logger.debug(f"Compiling hidden states function for key {hskey}")
-                    hidden_states_lowered = self._compute_hidden_states_fn.lower(*compargs[0])
-                    hidden_states_compiled = hidden_states_lowered.compile()
-                    self._lowerd_history[hskey] = hidden_states_compiled
-                if tskey not in self._lowerd_history.keys():
-                    logger.debug(f"Compiling tokens function for key {tskey}")
-                    tokens_lowered = self._compute_tokens_fn.lower(*compargs[1])
-                    tokens_compiled = tokens_lowered.compile()
-                    self._lowerd_history[tskey] = tokens_compiled
+            for key, fn, lowered in self.lower_key(num_tokens, padded_num_reqs, compargs):
+                lowered.compile()
+                self._lowerd_history[key] = fn
         else:
             if self.use_combined_forward:
                 logger.debug(f"Compiling combined forward function for key ({num_tokens}, {padded_num_reqs})")
-                _, self.kv_pages, _ = self._main_fn(*compargs)
-                self._lowerd_history[(num_tokens, padded_num_reqs)] = self._main_fn
+                main_fn = self.get_main_fn(padded_num_reqs)
+                _, self.kv_pages = main_fn(*compargs)
+                self._lowerd_history[(num_tokens, padded_num_reqs)] = main_fn
             else:
                 hskey = (num_tokens, padded_num_reqs, "hidden_states")
-                tskey = (num_tokens, padded_num_reqs, "tokens")
+                tskey = (padded_num_reqs, "tokens")
                 if hskey not in self._lowerd_history.keys():
                     logger.debug(f"Compiling hidden states function for key {hskey}")
                     _, self.kv_pages = self._compute_hidden_states_fn(*compargs[0])
                     self._lowerd_history[hskey] = self._compute_hidden_states_fn
                 if tskey not in self._lowerd_history.keys():
                     logger.debug(f"Compiling tokens function for key {tskey}")
-                    _ = self._compute_tokens_fn(*compargs[1])
-                    self._lowerd_history[tskey] = self._compute_tokens_fn
+                    tfn = self.get_tokens_fn(padded_num_reqs)
+                    _ = tfn(*compargs[1])
+                    self._lowerd_history[tskey] = tfn
 
-    def get_compiled_key(self, num_tokens: int, padded_num_reqs: int):
-        """Retrieve pre-compiled functions for given input dimensions.
+    def lower_key(
+        self,
+        num_tokens: int,
+        padded_num_reqs: int,
+        compargs,
+        skip_keys: set[tuple] | frozenset = frozenset(),
+    ) -> list[tuple[tuple, pjit.JitWrapped, typing.Any]]:
+        """Lower (AOT mode) the functions not yet cached for specific input dimensions.
 
         Args:
             num_tokens: Number of tokens in the input batch.
             padded_num_reqs: Padded number of requests for batching.
+            compargs: Compilation arguments for the model functions.
+            skip_keys: Keys already being compiled elsewhere.
 
         Returns:
-            Compiled function(s) for the specified dimensions. Returns a single
-            function for combined forward mode, or a tuple of (hidden_states_fn,
-            tokens_fn) for separate mode.
+            list: (cache_key, jitted_fn, lowered) entries; compiling `lowered`
+                warms up `jitted_fn` for `cache_key`.
         """
+        entries = []
         if self.use_combined_forward:
-            return self._lowerd_history[(num_tokens, padded_num_reqs)]
+            key = (num_tokens, padded_num_reqs)
+            if key not in self._lowerd_history and key not in skip_keys:
+                logger.debug(f"Lowering combined forward function for key {key}")
+                main_fn = self.get_main_fn(padded_num_reqs)
+                entries.append((key, main_fn, main_fn.lower(*compargs)))
         else:
             hskey = (num_tokens, padded_num_reqs, "hidden_states")
-            tskey = (num_tokens, padded_num_reqs, "tokens")
-            return self._lowerd_history[hskey], self._lowerd_history[tskey]
+            tskey = (padded_num_reqs, "tokens")
+            if hskey not in self._lowerd_history and hskey not in skip_keys:
+                logger.debug(f"Lowering hidden states function for key {hskey}")
+                hfn = self._compute_hidden_states_fn
+                entries.append((hskey, hfn, hfn.lower(*compargs[0])))
+            # The tokens function only sees [padded_num_reqs, hidden] inputs, so it is shared across num_tokens.
+            if tskey not in self._lowerd_history and tskey not in skip_keys:
+                logger.debug(f"Lowering tokens function for key {tskey}")
+                tfn = self.get_tokens_fn(padded_num_reqs)
+                entries.append((tskey, tfn, tfn.lower(*compargs[1])))
+        return entries
+
+    def get_compiled_key(self, num_tokens: int, padded_num_reqs: int):
+        """Retrieve pre-compiled functions for given input dimensions.
+
+        Args:
+            num_tokens: Number of tokens in the input batch.
+            padded_num_reqs: Padded number of requests for batching.
+
+        Returns:
+            Jitted function(s) warmed up for the specified dimensions. Returns a
+            single function for combined forward mode, or a tuple of
+            (hidden_states_fn, tokens_fn) for separate mode. The graph definition
+            is already bound as the first (static) argument.
+        """
+        entry = self._exec_table[self._tok_bucket[num_tokens]][self._req_bucket[padded_num_reqs]]
+        if entry is None:
+            raise KeyError((num_tokens, padded_num_reqs))
+        return entry
 
     def get_compile_configurations(
         self,
         kv_pages: PagesCache,
-        rng_key: jax.random.PRNGKey,
+        rng_keys: jax.Array,
         num_tokens: int,
         num_reqs_max_model_len: int,
         max_pages_per_req: int,
@@ -530,7 +888,7 @@ class ExecutorManager:
         Args:
             func_name: Name of the function to compile
             kv_pages: KV kv_pages pages
-            rng_key: Random key for sampling
+            rng_keys: Per-request sampling keys from the key pool
             num_reqs_max_model_len: Number of requests for max model length
             max_pages_per_req: Maximum pages per request
             max_num_reqs: Maximum number of requests
@@ -538,35 +896,66 @@ class ExecutorManager:
         """
         actual_num_reqs = min(num_tokens, num_reqs_max_model_len)
         padded_num_slices = metadata.get_padded_num_slices(num_tokens, max_num_reqs)
-        query_lens = [1] * num_reqs_max_model_len
+        hidden_size = self.model.config.get_text_config().hidden_size
+        buffers = self._compile_buffers
+        if buffers is None and not self.use_aot_forward:
+            buffers = self._build_compile_buffers(
+                num_tokens,
+                num_reqs_max_model_len,
+                max_pages_per_req,
+                max_num_reqs,
+                metadata,
+            )
+
+        def placeholder(name: str | None, shape: tuple[int, ...], dtype: jnp.dtype, fill_value: int = 0):
+            # `.lower()` only needs shapes/dtypes/shardings, so AOT mode never touches device memory.
+            if self.use_aot_forward:
+                return jax.ShapeDtypeStruct(shape, dtype, sharding=self._empty_sharding)
+            if name is None:
+                return jnp.full(shape, fill_value, dtype=dtype)
+            return buffers[name][tuple(slice(0, dim) for dim in shape)]
+
+        # input_ids / position_ids are donated, so they can't come from the shared pool.
+        input_ids = placeholder(None, (num_tokens,), jnp.int32)
+        position_ids = placeholder(None, (num_tokens,), jnp.int32)
+        # The metadata only depends on num_tokens, so every request bucket compiled for the
+        # same token count shares one instance.
+        metadata_key = (num_tokens, num_reqs_max_model_len, max_pages_per_req, padded_num_slices)
+        cache_metadata = self._metadata_cache.get(metadata_key)
+        if cache_metadata is None:
+            cache_metadata = PagesMetadata(
+                pages_tables=placeholder("pages_tables", (num_reqs_max_model_len, max_pages_per_req), jnp.int32),
+                context_lens=placeholder("context_lens", (num_reqs_max_model_len,), jnp.int32),
+                query_start_loc=placeholder("query_start_loc", (num_reqs_max_model_len + 1,), jnp.int32),
+                num_seqs=placeholder(None, (1,), jnp.int32, actual_num_reqs),
+                slot_mapping=placeholder("slot_mapping", (3, padded_num_slices), jnp.int32),
+                num_kv_update_slices=placeholder(None, (1,), jnp.int32, padded_num_slices),
+                num_slices_per_kv_cache_update_page=metadata.num_slices_per_kv_cache_update_page,
+                page_size=metadata.page_size,
+            )
+            self._metadata_cache[metadata_key] = cache_metadata
+        if self.use_aot_forward:
+            logits_indices = placeholder(None, (padded_num_reqs,), jnp.int32)
+        else:
+            logits_indices = self._arange(padded_num_reqs)
+        sampling_metadata = ModelRunnerSamplingMetadata(
+            top_p=placeholder("ones_sampling", (padded_num_reqs,), self.sampling_params_dtype),
+            temperature=placeholder("ones_sampling", (padded_num_reqs,), self.sampling_params_dtype),
+            min_p=placeholder("zeros_f32", (padded_num_reqs,), jnp.float32),
+            top_k=placeholder("zeros_i32", (padded_num_reqs,), jnp.int32),
+        )
         if self.use_combined_forward:
             example_args = (
                 self.graphdef,
                 self.graphstate,
                 self.graphother,
-                jnp.zeros((num_tokens,), dtype=jnp.int32),
-                jnp.zeros(num_tokens, dtype=jnp.int32),
+                input_ids,
+                position_ids,
                 kv_pages,
-                PagesMetadata(
-                    pages_tables=jnp.full(
-                        (num_reqs_max_model_len, max_pages_per_req), fill_value=PAGE_TABLE_PADDING_VAL, dtype=jnp.int32
-                    ),
-                    context_lens=jnp.ones((num_reqs_max_model_len,), dtype=jnp.int32),
-                    query_start_loc=jnp.cumsum(jnp.array([0, *query_lens], dtype=jnp.int32), axis=0, dtype=jnp.int32),
-                    num_seqs=jnp.array([actual_num_reqs], dtype=jnp.int32),
-                    slot_mapping=jnp.full((3, padded_num_slices), fill_value=SLOT_MAPPING_PADDING_VAL, dtype=jnp.int32),
-                    num_kv_update_slices=jnp.array([padded_num_slices], dtype=jnp.int32),
-                    num_slices_per_kv_cache_update_page=metadata.num_slices_per_kv_cache_update_page,
-                    page_size=metadata.page_size,
-                ),
-                jnp.arange(padded_num_reqs, dtype=jnp.int32),
-                ModelRunnerSamplingMetadata(
-                    top_p=jnp.ones((padded_num_reqs,), dtype=jnp.float32),
-                    temperature=jnp.ones((padded_num_reqs,), dtype=jnp.float32),
-                    min_p=jnp.zeros((padded_num_reqs,), dtype=jnp.float32),
-                    top_k=jnp.zeros((padded_num_reqs,), dtype=jnp.int32),
-                ),
-                rng_key,
+                cache_metadata,
+                logits_indices,
+                sampling_metadata,
+                rng_keys,
             )
         else:
             example_args = (
@@ -574,69 +963,243 @@ class ExecutorManager:
                     self.graphdef,
                     self.graphstate,
                     self.graphother,
-                    jnp.zeros((num_tokens,), dtype=jnp.int32),
-                    jnp.zeros(num_tokens, dtype=jnp.int32),
+                    input_ids,
+                    position_ids,
                     kv_pages,
-                    PagesMetadata(
-                        pages_tables=jnp.full(
-                            (num_reqs_max_model_len, max_pages_per_req),
-                            fill_value=PAGE_TABLE_PADDING_VAL,
-                            dtype=jnp.int32,
-                        ),
-                        context_lens=jnp.ones((num_reqs_max_model_len,), dtype=jnp.int32),
-                        query_start_loc=jnp.cumsum(
-                            jnp.array([0, *query_lens], dtype=jnp.int32), axis=0, dtype=jnp.int32
-                        ),
-                        num_seqs=jnp.array([actual_num_reqs], dtype=jnp.int32),
-                        slot_mapping=jnp.full(
-                            (3, padded_num_slices), fill_value=SLOT_MAPPING_PADDING_VAL, dtype=jnp.int32
-                        ),
-                        num_kv_update_slices=jnp.array([padded_num_slices], dtype=jnp.int32),
-                        num_slices_per_kv_cache_update_page=metadata.num_slices_per_kv_cache_update_page,
-                        page_size=metadata.page_size,
-                    ),
+                    cache_metadata,
+                    logits_indices,
                 ),
                 (
                     self.graphdef,
                     self.graphstate,
                     self.graphother,
-                    jnp.ones((num_tokens, self.model.config.get_text_config().hidden_size), self.model.dtype),
-                    jnp.arange(padded_num_reqs, dtype=jnp.int32),
-                    ModelRunnerSamplingMetadata(
-                        top_p=jnp.ones((padded_num_reqs,), dtype=jnp.float32),
-                        temperature=jnp.ones((padded_num_reqs,), dtype=jnp.float32),
-                        min_p=jnp.zeros((padded_num_reqs,), dtype=jnp.float32),
-                        top_k=jnp.zeros((padded_num_reqs,), dtype=jnp.int32),
-                    ),
-                    rng_key,
+                    placeholder("hidden_states", (padded_num_reqs, hidden_size), self.model.dtype),
+                    sampling_metadata,
+                    rng_keys,
                 ),
             )
         return example_args
 
+    def _build_compile_buffers(
+        self,
+        max_num_tokens: int,
+        num_reqs_max_model_len: int,
+        max_pages_per_req: int,
+        max_num_reqs: int,
+        metadata: PagesCacheMetaData,
+    ) -> dict[str, jax.Array]:
+        """Allocate one set of max-sized placeholder buffers shared by all compile configurations.
+
+        Only needed in JIT mode, where the functions are actually executed during
+        compilation. Per-configuration example arguments are sliced out of these
+        buffers instead of being allocated from scratch for every
+        (num_tokens, padded_num_reqs) pair.
+        """
+        hidden_size = self.model.config.get_text_config().hidden_size
+        max_padded_slices = metadata.get_padded_num_slices(max_num_tokens, max_num_reqs)
+        host_buffers = {
+            "pages_tables": np.full((num_reqs_max_model_len, max_pages_per_req), PAGE_TABLE_PADDING_VAL, np.int32),
+            "context_lens": np.ones((num_reqs_max_model_len,), np.int32),
+            "query_start_loc": np.arange(num_reqs_max_model_len + 1, dtype=np.int32),
+            "slot_mapping": np.full((3, max_padded_slices), SLOT_MAPPING_PADDING_VAL, np.int32),
+            "ones_sampling": np.ones((max_num_reqs,), self.sampling_params_dtype),
+            "zeros_f32": np.zeros((max_num_reqs,), np.float32),
+            "zeros_i32": np.zeros((max_num_reqs,), np.int32),
+        }
+        buffers = {name: jax.device_put(buf, self._empty_sharding) for name, buf in host_buffers.items()}
+        if not self.use_combined_forward:
+            buffers["hidden_states"] = jax.device_put(
+                jnp.ones((max_num_reqs, hidden_size), self.model.dtype),
+                self._empty_sharding,
+            )
+        return buffers
 
-def _get_padded_num_reqs_with_upper_limit(x: int, upper_limit: int) -> int:
+
+_DEFAULT_TOP_P_K = 64
+_LARGE_BATCH_MIN_REQS = 32
+
+
+def _sample_top_p(
+    logits: jax.Array,
+    sampling_params: ModelRunnerSamplingMetadata,
+    rng_keys: jax.Array,
+    top_p_k: int,
+    sample_dtype: jnp.dtype | None = None,
+) -> jax.Array:
+    """Samples one token per row of `logits` with the top-p sampler.
+
+    `top_p` and `temperature` are cast to the logits dtype (a no-op when they are
+    already stored in it), so float32 parameters never promote 16-bit logits, and
+    the top-k sort over them, to float32.
+
+    Returns:
+        Sampled token ids of shape `[num_rows, 1]`.
+    """
+    if sample_dtype is not None:
+        logits = logits.astype(sample_dtype)
+    samples = jax.vmap(sample_top_p_efficient, in_axes=(0, 0, 0, 0, None), out_axes=0)(
+        logits,
+        sampling_params.top_p.astype(logits.dtype),
+        sampling_params.temperature.astype(logits.dtype),
+        rng_keys[: logits.shape[0]],
+        top_p_k,
+    )
+    return samples.reshape(-1, 1)
+
+
+def _get_top_p_k(padded_num_reqs: int, large_batch_top_p_k: int | None = None) -> int:
+    """Number of top logits the top-p sampler sorts for a request bucket.
+
+    Every bucket uses the default candidate set unless `large_batch_top_p_k`
+    is given, in which case buckets of `_LARGE_BATCH_MIN_REQS` or more use
+    that (cheaper) k instead. The request buckets map to at most two distinct
+    values, so only a few sampler variants are compiled.
+    """
+    if large_batch_top_p_k is not None and padded_num_reqs >= _LARGE_BATCH_MIN_REQS:
+        return large_batch_top_p_k
+    return _DEFAULT_TOP_P_K
+
+
+def _get_padded_num_reqs_with_upper_limit(
+    x: int,
+    upper_limit: int,
+    min_input_pad: int = 8,
+    knee: int | None = None,
+    stride: int = 16,
+) -> int:
     """Calculate padded request count for compilation efficiency.
 
-    Pads the number of requests to powers of 2 (up to 8) or the nearest
-    power of 2 above 8. This reduces the number of unique compilations
-    needed while maintaining good utilization.
+    Uses a two-level ladder: counts up to `min_input_pad` are padded to
+    `min_input_pad`, counts up to `knee` are padded to the next power of 2,
+    and larger counts are padded to the next multiple of `stride`. Without a
+    knee the ladder is pure powers of 2, which gives the fewest compilations;
+    a knee trades extra compilations for less padding waste on large batches.
 
     Args:
         x: Actual number of requests
         upper_limit: Maximum allowed requests
+        min_input_pad: Smallest padded request count
+        knee: Largest request count padded to a power of 2, or None for no limit
+        stride: Padding stride above the knee
 
     Returns:
         int: Padded request count, capped at upper_limit
 
     Example:
-        >>> _get_padded_num_reqs_with_upper_limit(3, 32)   # Returns 8
-        >>> _get_padded_num_reqs_with_upper_limit(10, 32)  # Returns 16
-        >>> _get_padded_num_reqs_with_upper_limit(20, 16)  # Returns 16
+        >>> _get_padded_num_reqs_with_upper_limit(3, 32)    # Returns 8
+        >>> _get_padded_num_reqs_with_upper_limit(10, 32)   # Returns 16
+        >>> _get_padded_num_reqs_with_upper_limit(20, 16)   # Returns 16
+        >>> _get_padded_num_reqs_with_upper_limit(70, 256, knee=64)  # Returns 80
     """
-    res = 8 if x <= 8 else 1 << (x - 1).bit_length()
+    if x <= min_input_pad:
+        res = min_input_pad
+    elif knee is None or x <= knee:
+        res = 1 << (x - 1).bit_length()
+    else:
+        res = ((x + stride - 1) // stride) * stride
     return min(res, upper_limit)
 
 
+def _enumerate_padded_num_reqs(
+    upper_limit: int,
+    min_input_pad: int = 8,
+    knee: int | None = None,
+    stride: int = 16,
+) -> list[int]:
+    """Enumerate every value `_get_padded_num_reqs_with_upper_limit` can return.
+
+    Walks the ladder directly (the power-of-2 rungs up to the knee, then the
+    `stride` multiples) instead of evaluating the bucketer for every request
+    count.
+
+    Args:
+        upper_limit: Maximum allowed requests
+        min_input_pad: Smallest padded request count
+        knee: Largest request count padded to a power of 2, or None for no limit
+        stride: Padding stride above the knee
+
+    Returns:
+        list[int]: Sorted, unique padded request counts
+
+    Example:
+        >>> _enumerate_padded_num_reqs(100)  # Returns [8, 16, 32, 64, 100]
+        >>> _enumerate_padded_num_reqs(100, knee=32, stride=32)  # Returns [8, 16, 32, 64, 96, 100]
+    """
+    paddings = {min(min_input_pad, upper_limit)}
+    pow2_limit = upper_limit if knee is None else min(knee, upper_limit)
+    if pow2_limit > min_input_pad:
+        padd = 1 << min_input_pad.bit_length()
+        last = 1 << (pow2_limit - 1).bit_length()
+        while padd <= last:
+            paddings.add(min(padd, upper_limit))
+            padd <<= 1
+    stride_start = upper_limit if knee is None else max(knee, min_input_pad)
+    if stride_start < upper_limit:
+        padd = ((stride_start + stride) // stride) * stride
+        while True:
+            paddings.add(min(padd, upper_limit))
+            if padd >= upper_limit:
+                break
+            padd += stride
+    return sorted(paddings)
+
+
+def _check_num_reqs_bucket_knee(knee: int | None, min_input_pad: int) -> None:
+    """Reject knees that would make the request-bucket ladder non-monotonic.
+
+    Counts up to the knee are padded to the next power of 2, so a knee that is
+    not itself a power of 2 pads the counts just below it past the first
+    `stride` rungs above it (e.g. knee=40, stride=16 pads 33-40 to 64 but 41-48
+    to 48).
+
+    Raises:
+        ValueError: If `knee` is not a power of 2 or is smaller than `min_input_pad`.
+    """
+    if knee is None:
+        return
+    if knee <= 0 or knee & (knee - 1) != 0 or knee < min_input_pad:
+        raise ValueError(
+            f"num_reqs_bucket_knee must be a power of 2 no smaller than min_input_pad={min_input_pad}, got {knee}"
+        )
+
+
+def _reachable_bucket_pairs(
+    num_tokens_paddings: list[int],
+    upper_limit: int,
+    min_input_pad: int = 8,
+    knee: int | None = None,
+    stride: int = 16,
+) -> list[tuple[int, int]]:
+    """List the (padded num_tokens, padded num_reqs) pairs a step can dispatch to.
+
+    Every scheduled request contributes at least one token, so a request bucket
+    is reachable from a token bucket when the smallest request count padded to
+    it fits in that token bucket. The smallest count is taken from
+    `_get_padded_num_reqs_with_upper_limit` itself rather than from the
+    previous rung of the ladder.
+
+    Args:
+        num_tokens_paddings: Sorted token padding sizes
+        upper_limit: Maximum allowed requests
+        min_input_pad: Smallest padded request count
+        knee: Largest request count padded to a power of 2, or None for no limit
+        stride: Padding stride above the knee
+
+    Returns:
+        list[tuple[int, int]]: Reachable pairs, ordered by token bucket then request bucket
+    """
+    lower_bounds: dict[int, int] = {}
+    for num_reqs in range(1, upper_limit + 1):
+        padd = _get_padded_num_reqs_with_upper_limit(num_reqs, upper_limit, min_input_pad, knee, stride)
+        lower_bounds.setdefault(padd, num_reqs)
+    return [
+        (num_tokens, padd)
+        for num_tokens in num_tokens_paddings
+        for padd in sorted(lower_bounds)
+        if lower_bounds[padd] <= num_tokens
+    ]
+
+
 class eSurgeRunner:
     """High-performance model runner for efficient batched inference.
 
@@ -703,6 +1266,12 @@ class eSurgeRunner:
         max_num_seqs: int = 8,
         use_combined_forward: bool = False,
         use_aot_forward: bool = True,
+        min_input_pad: int = 8,
+        num_reqs_bucket_knee: int | None = None,
+        num_reqs_bucket_stride: int = 16,
+        sample_dtype: jnp.dtype | None = None,
+        large_batch_top_p_k: int | None = None,
+        compile_cache_dir: str | os.PathLike | None = None,
         verbose: bool = False,
     ):
         """Initialize the model runner.
@@ -713,6 +1282,16 @@ class eSurgeRunner:
             page_size: Size of each page in the paged attention mechanism
             max_model_len: Maximum model sequence length
             max_num_seqs: Maximum number of sequences to process in parallel
+            min_input_pad: Smallest padded request count
+            num_reqs_bucket_knee: Request counts up to this value are padded to the next power of 2
+                (None pads every count to a power of 2); must be a power of 2 >= min_input_pad
+            num_reqs_bucket_stride: Padding stride for request counts above the knee
+            sample_dtype: Opt-in dtype logits are cast to before sampling; lower precision changes
+                sampling numerics (None, the default, keeps the LM-head dtype)
+            large_batch_top_p_k: Opt-in top-p candidate count for large request buckets
+                (None keeps the default for every batch size)
+            compile_cache_dir: Directory to persist compiled executables in across processes; sets
+                the process-global JAX compilation cache unless one is already configured
         """
         logger.debug(f"Initializing eSurgeRunner with {max_model_len=}, {max_num_seqs=}")
         logger.debug(f"Configuration: {hbm_utilization=}, {page_size=}, {use_combined_forward=}, {use_aot_forward=}")
@@ -737,6 +1316,13 @@ class eSurgeRunner:
             model.init_pages(self.metadata),
             use_combined_forward,
             use_aot_forward,
+            min_input_pad=min_input_pad,
+            num_reqs_bucket_knee=num_reqs_bucket_knee,
+            num_reqs_bucket_stride=num_reqs_bucket_stride,
+            sample_dtype=sample_dtype,
+            large_batch_top_p_k=large_batch_top_p_k,
+            compile_cache_dir=compile_cache_dir,
+            max_num_reqs=self.max_num_reqs,
         )
         self.log_it = logger.info if verbose else logger.debug
         logger.debug("Setting up internal variables and buffers")
@@ -755,24 +1341,26 @@ class eSurgeRunner:
 
     def get_prepare_inputs_fn(self):
         """Fully-jitted input prep with fixed shapes and mask-based gathers."""
-        paddings = self.num_tokens_paddings_arr
         max_num_reqs = int(self.max_num_reqs)
         page_size = int(self.metadata.page_size)
         max_pages_per_req = int(self.metadata.max_num_pages_per_req)
         num_reqs_max_model_len = int(self.num_reqs_max_model_len)
-        slices_per_page = int(self.metadata.num_slices_per_kv_cache_update_page)
         page_table_pad = jnp.int32(PAGE_TABLE_PADDING_VAL)
         slot_mapping_pad = jnp.int32(SLOT_MAPPING_PADDING_VAL)
         max_num_tokens = int(self.max_num_tokens)
         max_padded_slices = int(self.max_padded_slices)
 
-        i_tokens = jnp.arange(max_num_tokens, dtype=jnp.int32)
-        i_reqs = jnp.arange(max_num_reqs, dtype=jnp.int32)
-        i_rows_pt = jnp.arange(num_reqs_max_model_len, dtype=jnp.int32)
-        i_slices = jnp.arange(max_padded_slices, dtype=jnp.int32)
+        # With few requests a broadcast compare-and-count is fully parallel, whereas
+        # searchsorted lowers to a serial binary search.
+        use_rank_search = max_num_reqs <= 256
+
+        def search_right(sorted_keys: jax.Array, queries: jax.Array) -> jax.Array:
+            if use_rank_search:
+                return jnp.sum(queries[:, None] >= sorted_keys[None, :], axis=1, dtype=jnp.int32)
+            return jnp.searchsorted(sorted_keys, queries, side="right")
 
         @ejit(
-            static_argnums=(),  # all dynamic, shapes fixed
+            static_argnums=(0,),  # padded_total; every buffer shape is fixed
             donate_argnames=[
                 "input_ids_buf",
                 "position_ids_buf",
@@ -782,8 +1370,7 @@ class eSurgeRunner:
                 "slot_mapping_buf",
             ],
             in_shardings=(
-                self._empty_sharding,  # scheduled_full [max_num_reqs]
-                self._empty_sharding,  # num_reqs (scalar)
+                self._empty_sharding,  # step_meta [max_num_reqs + 2]
                 self._empty_sharding,  # num_computed_tokens [max_num_reqs]
                 self._empty_sharding,  # token_ids [max_num_reqs, max_model_len]
                 self._empty_sharding,  # seq_page_table [max_num_reqs, max_pages_per_req]
@@ -802,15 +1389,12 @@ class eSurgeRunner:
                 self._empty_sharding,  # pages_tables_buf
                 self._empty_sharding,  # slot_mapping_buf
                 self._empty_sharding,  # logits_indices_full [max_num_reqs]
-                self._empty_sharding,  # padded_total (scalar)
-                self._empty_sharding,  # padded_num_reqs (scalar)
-                self._empty_sharding,  # num_kv_update_slices (scalar)
-                self._empty_sharding,  # padded_num_slices (scalar)
+                self._empty_sharding,  # num_kv_update_slices [1]
             ),
         )
         def _fn(
-            scheduled_full: jax.Array,  # [max_num_reqs] scheduled tokens per req
-            num_reqs: jax.Array,  # scalar int32
+            padded_total: int,  # token bucket, resolved on host
+            step_meta: jax.Array,  # [max_num_reqs + 2]: scheduled tokens per req, num_reqs, padded_num_reqs
             num_computed_tokens: jax.Array,  # [max_num_reqs]
             token_ids: jax.Array,  # [max_num_reqs, max_model_len]
             seq_page_table: jax.Array,  # [max_num_reqs, max_pages_per_req]
@@ -821,28 +1405,31 @@ class eSurgeRunner:
             pages_tables_buf: jax.Array,  # [num_reqs_max_model_len, max_pages_per_req]
             slot_mapping_buf: jax.Array,  # [3, max_padded_slices]
         ):
-            nr = jnp.int32(num_reqs)
+            scheduled_full = step_meta[:max_num_reqs]
+            nr = step_meta[max_num_reqs]
+            padded_num_reqs = step_meta[max_num_reqs + 1]  # bucketed on host
+
+            # Index ranges are built in the trace: they lower to iotas that XLA fuses into
+            # the compares/gathers, instead of captured device arrays baked in as constants.
+            i_tokens = jnp.arange(max_num_tokens, dtype=jnp.int32)
+            i_reqs = jnp.arange(max_num_reqs, dtype=jnp.int32)
+            i_rows_pt = jnp.arange(num_reqs_max_model_len, dtype=jnp.int32)
+            i_slices = jnp.arange(max_padded_slices, dtype=jnp.int32)
 
             # Mask scheduled beyond active nr
             mask_reqs = i_reqs < nr
             scheduled = jnp.where(mask_reqs, scheduled_full, 0)
 
-            # Cum tokens per request and total
+            # Cum tokens per request and total; cum_prev is the exclusive prefix sum
             cum = jnp.cumsum(scheduled)  # [max_num_reqs], non-decreasing
+            cum_prev = cum - scheduled
             total = jnp.sum(scheduled)  # scalar int32
 
-            # padded_total via searchsorted on paddings
-            idx_pad = jnp.searchsorted(paddings, total, side="left")
-            idx_pad = jnp.minimum(idx_pad, paddings.shape[0] - 1)
-            padded_total = paddings[idx_pad]
-
             # Fill token-level mapping for all max_num_tokens positions (masked)
             valid_tok = i_tokens < total
             # find req id for each token index: rightmost cum > t
-            req_for_tok = jnp.searchsorted(cum, i_tokens, side="right")  # [max_num_tokens], up to max_num_reqs
+            req_for_tok = search_right(cum, i_tokens)  # [max_num_tokens], up to max_num_reqs
             req_for_tok = jnp.where(valid_tok, req_for_tok, 0)  # safe index for invalid
-            # previous cum
-            cum_prev = jnp.concatenate([jnp.zeros((1,), jnp.int32), cum[:-1]])
             base_pos = num_computed_tokens[req_for_tok]
             off_in_req = i_tokens - cum_prev[req_for_tok]
             positions_full = jnp.where(valid_tok, base_pos + off_in_req, 0)
@@ -852,10 +1439,6 @@ class eSurgeRunner:
             in_ids_full = token_ids[req_for_tok, safe_pos]
             in_ids_full = jnp.where(valid_tok, in_ids_full, 0)
 
-            # Write full buffers (we will slice to [:padded_total] on host)
-            input_ids_buf = input_ids_buf.at[:].set(in_ids_full)
-            position_ids_buf = position_ids_buf.at[:].set(positions_full)
-
             # query_start_loc and seq_lens (fixed-size)
             qsl = jnp.zeros((max_num_reqs + 1,), dtype=jnp.int32).at[1:].set(cum)
             seq_lens = jnp.where(mask_reqs, num_computed_tokens + scheduled, 0)
@@ -872,21 +1455,18 @@ class eSurgeRunner:
             lpe = (jnp.maximum(e, 1) - 1) // page_size
             page_lens = jnp.where(scheduled > 0, lpe - lps + 1, 0)  # [max_num_reqs]
             page_cum = jnp.cumsum(page_lens)
+            page_cum_prev = page_cum - page_lens
             total_pages = jnp.sum(page_lens)
 
-            # Compute padded_num_slices (upper bound, then capped)
-            pages_est = jnp.minimum(2 * jnp.int32(max_num_reqs) + padded_total // page_size, padded_total)
-            tmp = (pages_est + jnp.int32(slices_per_page) - 1) // jnp.int32(slices_per_page)
-            padded_num_slices = tmp * jnp.int32(slices_per_page)
-            padded_num_slices = jnp.minimum(padded_num_slices, jnp.int32(max_padded_slices))
+            # padded_num_slices only depends on the (static) token bucket
+            padded_num_slices = self._get_padded_num_slices(padded_total)
 
             # For each potential slice index (0..max_padded_slices-1), find (req_id, local_page_offset)
             valid_slice = i_slices < total_pages
             within_pad = i_slices < padded_num_slices
             slice_active = valid_slice & within_pad
 
-            page_cum_prev = jnp.concatenate([jnp.zeros((1,), jnp.int32), page_cum[:-1]])
-            req_for_slice = jnp.searchsorted(page_cum, i_slices, side="right")
+            req_for_slice = search_right(page_cum, i_slices)
             req_for_slice = jnp.where(slice_active, req_for_slice, 0)
             local_off = i_slices - page_cum_prev[req_for_slice]
 
@@ -908,46 +1488,116 @@ class eSurgeRunner:
             slice_lens = jnp.maximum(kv_local_en - kv_local_st, 0)
             kv_cache_start = kv_local_st + page_numbers * page_size
 
-            # cumulative new_kv_start across valid slices
+            # cumulative new_kv_start across valid slices (exclusive scan = inclusive scan - value)
             slice_lens_masked = jnp.where(slice_active, slice_lens, 0)
-            csl = jnp.cumsum(slice_lens_masked)
-            new_kv_start = jnp.roll(csl, 1).at[0].set(0)
-            new_kv_start = jnp.where(slice_active, new_kv_start, 0)
-
-            # Build slot_mapping_buf = [3, max_padded_slices], pad elsewhere
-            sm0 = jnp.where(within_pad, jnp.where(slice_active, kv_cache_start, slot_mapping_pad), slot_mapping_pad)
-            sm1 = jnp.where(within_pad, jnp.where(slice_active, new_kv_start, slot_mapping_pad), slot_mapping_pad)
-            sm2 = jnp.where(within_pad, jnp.where(slice_active, slice_lens, slot_mapping_pad), slot_mapping_pad)
-            slot_mapping_buf = slot_mapping_buf.at[0, :].set(sm0)
-            slot_mapping_buf = slot_mapping_buf.at[1, :].set(sm1)
-            slot_mapping_buf = slot_mapping_buf.at[2, :].set(sm2)
-
-            # padded_num_reqs: 8 if <=8 else next pow2, capped
-            nr_safe = jnp.maximum(nr, 1)
-            next_pow2 = jnp.left_shift(1, jnp.ceil(jnp.log2(nr_safe)).astype(jnp.int32))
-            padded_num_reqs = jnp.where(nr <= 8, jnp.int32(8), next_pow2)
-            padded_num_reqs = jnp.minimum(padded_num_reqs, jnp.int32(max_num_reqs))
+            new_kv_start = jnp.where(slice_active, jnp.cumsum(slice_lens_masked) - slice_lens_masked, 0)
+
+            # Build slot_mapping_buf = [3, max_padded_slices] with one masked store; pad elsewhere
+            # (slice_active already implies within_pad)
+            slot_values = jnp.stack([kv_cache_start, new_kv_start, slice_lens], axis=0)
+            slot_mapping_buf = jnp.where(slice_active[None, :], slot_values, slot_mapping_pad)
 
             tmp_logits = qsl[1:] - 1
             mask_logits = i_reqs < padded_num_reqs
             logits_indices_full = jnp.where(mask_logits, tmp_logits, 0)
 
             return (
-                input_ids_buf.at[:].set(in_ids_full),
-                position_ids_buf.at[:].set(positions_full),
+                # Full-size [max_num_tokens] buffers (sliced to [:padded_total] on host);
+                # they reuse the donated input buffers' storage.
+                in_ids_full,
+                positions_full,
                 qsl,
                 seq_lens,
                 pt,
                 slot_mapping_buf,
                 logits_indices_full,
-                padded_total,
-                padded_num_reqs,
-                total_pages,  # num_kv_update_slices
-                padded_num_slices,
+                total_pages.reshape(1),  # num_kv_update_slices
+            )
+
+        return _fn
+
+    def get_prepare_decode_inputs_fn(self):
+        """Jitted input prep specialized for a single request decoding a single token.
+
+        Produces the same buffers as `get_prepare_inputs_fn` for `num_reqs == 1`
+        and one scheduled token, but writes the handful of live entries directly
+        instead of running the scans and gathers over every token/slice slot.
+        """
+        max_num_reqs = int(self.max_num_reqs)
+        page_size = int(self.metadata.page_size)
+        page_table_pad = jnp.int32(PAGE_TABLE_PADDING_VAL)
+        slot_mapping_pad = jnp.int32(SLOT_MAPPING_PADDING_VAL)
+
+        @ejit(
+            donate_argnames=[
+                "input_ids_buf",
+                "position_ids_buf",
+                "query_start_loc_buf",
+                "seq_lens_buf",
+                "pages_tables_buf",
+                "slot_mapping_buf",
+            ],
+            in_shardings=(
+                self._empty_sharding,  # num_computed_tokens [max_num_reqs]
+                self._empty_sharding,  # token_ids [max_num_reqs, max_model_len]
+                self._empty_sharding,  # seq_page_table [max_num_reqs, max_pages_per_req]
+                self._empty_sharding,  # input_ids_buf [max_num_tokens]
+                self._empty_sharding,  # position_ids_buf [max_num_tokens]
+                self._empty_sharding,  # query_start_loc_buf [max_num_reqs+1]
+                self._empty_sharding,  # seq_lens_buf [max_num_reqs]
+                self._empty_sharding,  # pages_tables_buf [num_reqs_max_model_len, max_pages_per_req]
+                self._empty_sharding,  # slot_mapping_buf [3, max_padded_slices]
+            ),
+            out_shardings=(
+                self._empty_sharding,  # input_ids_buf
+                self._empty_sharding,  # position_ids_buf
+                self._empty_sharding,  # query_start_loc_buf
+                self._empty_sharding,  # seq_lens_buf
+                self._empty_sharding,  # pages_tables_buf
+                self._empty_sharding,  # slot_mapping_buf
+                self._empty_sharding,  # logits_indices_full [max_num_reqs]
+                self._empty_sharding,  # num_kv_update_slices [1]
+            ),
+        )
+        def _fn(
+            num_computed_tokens: jax.Array,
+            token_ids: jax.Array,
+            seq_page_table: jax.Array,
+            input_ids_buf: jax.Array,
+            position_ids_buf: jax.Array,
+            query_start_loc_buf: jax.Array,
+            seq_lens_buf: jax.Array,
+            pages_tables_buf: jax.Array,
+            slot_mapping_buf: jax.Array,
+        ):
+            position = num_computed_tokens[0]
+            input_ids_buf = jnp.zeros_like(input_ids_buf).at[0].set(token_ids[0, position])
+            position_ids_buf = jnp.zeros_like(position_ids_buf).at[0].set(position)
+            query_start_loc_buf = jnp.ones_like(query_start_loc_buf).at[0].set(0)
+            seq_lens_buf = jnp.zeros_like(seq_lens_buf).at[0].set(position + 1)
+            pages_tables_buf = jnp.full_like(pages_tables_buf, page_table_pad).at[0].set(seq_page_table[0])
+
+            page_number = seq_page_table[0, position // page_size]
+            slot = jnp.stack([page_number * page_size + position % page_size, jnp.int32(0), jnp.int32(1)])
+            slot_mapping_buf = jnp.full_like(slot_mapping_buf, slot_mapping_pad).at[:, 0].set(slot)
+
+            return (
+                input_ids_buf,
+                position_ids_buf,
+                query_start_loc_buf,
+                seq_lens_buf,
+                pages_tables_buf,
+                slot_mapping_buf,
+                jnp.zeros((max_num_reqs,), jnp.int32),  # logits_indices_full
+                jnp.ones((1,), jnp.int32),  # num_kv_update_slices
             )
 
         return _fn
 
+    def _get_padded_num_slices(self, padded_total: int) -> int:
+        """Number of KV-update slices reserved for a token bucket."""
+        return min(int(self.metadata.get_padded_num_slices(padded_total, self.max_num_reqs)), self.max_padded_slices)
+
     @staticmethod
     def _get_token_paddings(min_token_size: int, max_token_size: int, padding_gap: int) -> list[int]:
         """Generate padding sizes for efficient compilation.
@@ -993,6 +1643,9 @@ class eSurgeRunner:
         )
         self.max_num_tokens = self.num_tokens_paddings[-1]
         self.requests: dict[str, CachedRequestState] = {}
+        self.scheduled_tokens_buf = np.zeros((self.max_num_reqs,), dtype=np.int32)
+        # Sampling metadata per request bucket; only valid while the buffer's membership is unchanged
+        self._sampling_metadata_cache: dict[int, ModelRunnerSamplingMetadata] = {}
         logger.debug(f"Token padding sizes: {len(self.num_tokens_paddings)} levels, max={self.max_num_tokens}")
 
         logger.debug(
@@ -1004,10 +1657,12 @@ class eSurgeRunner:
             self.max_num_tokens,
             self.model.config.get_text_config().vocab_size,
             [self.metadata.page_size],
+            sampling_dtype=self.executor_manager.sampling_params_dtype,
         )
 
-        self.arange = jnp.arange(self.max_num_tokens, dtype=jnp.int32)
-        self.arange_np = jnp.arange(self.max_num_reqs, dtype=jnp.int32)  # Pre-allocate for reuse
+        # Sampled tokens of every batch window are written here in place; twice `max_num_reqs`
+        # rows so a padded window starting near the end never gets its offset clamped.
+        self.selected_tokens_buf = jnp.full((2 * self.max_num_reqs, 1), -1, dtype=jnp.int32)
 
         self.input_ids_buf = jnp.zeros((self.max_num_tokens,), dtype=jnp.int32)
         self.position_ids_buf = jnp.zeros((self.max_num_tokens,), dtype=jnp.int32)
@@ -1027,16 +1682,10 @@ class eSurgeRunner:
             dtype=jnp.int32,
         )
 
-        # Pre-allocate flattened page table buffer to avoid repeated flatten operations
-        self.page_table_flat_buf = jnp.zeros(
-            (self.num_reqs_max_model_len * self.max_pages_per_req,),
-            dtype=jnp.int32,
-        )
-
-        # Pre-allocate buffers for slot mapping computation
-        self.slot_mapping_scratch_buf = jnp.zeros((self.max_padded_slices, 3), dtype=jnp.int32)
-        self.num_tokens_paddings_arr = jnp.array(self.num_tokens_paddings, dtype=jnp.int32)
         self._prepare_inputs_fn = self.get_prepare_inputs_fn()
+        self._prepare_decode_inputs_fn = self.get_prepare_decode_inputs_fn()
+        self._write_selected_tokens_fn = self.get_write_selected_tokens_fn()
+        self._update_token_buffers_fn = self.get_update_token_buffers_fn()
         logger.debug(f"Allocated buffers: max_padded_slices={self.max_padded_slices}")
 
     def compile(self):
@@ -1055,101 +1704,72 @@ class eSurgeRunner:
             max_num_reqs=self.max_num_reqs,
             metadata=self.metadata,
         )
+        self._compile_prepare_inputs()
+        self._compile_token_updates()
 
-    @staticmethod
-    def _vectorized_slot_mapping(
-        num_computed_tokens: jax.Array,  # [>=num_reqs]
-        num_scheduled_tokens_per_req: jax.Array,  # [num_reqs]
-        page_table_flat: jax.Array,  # [num_reqs * max_num_pages_per_req]
-        num_reqs: int,
-        page_size: int,
-        max_num_pages_per_req: int,
-    ) -> jax.Array:
-        """Compute slot mapping for paged attention in vectorized manner.
-
-        Creates a mapping from new KV values to their storage locations
-        in the paged KV cache. This is critical for efficient attention
-        computation with paged memory management.
-
-        The output array has shape [total_slices, 3] where each row contains:
-        - kv_cache_start: Starting position in KV cache
-        - new_kv_start: Starting position in new KV values
-        - slice_len: Length of this slice
+    def _compile_prepare_inputs(self):
+        """AOT-compile the input-preparation functions for every token bucket.
 
-        Args:
-            num_computed_tokens: Tokens already processed per request
-            num_scheduled_tokens_per_req: New tokens to process per request
-            page_table_flat: Flattened page table for all requests
-            num_reqs: Number of active requests
-            page_size: Size of each KV cache page
-            max_num_pages_per_req: Maximum pages per request
+        Runs after the executor has set up the compilation cache, so with a
+        `compile_cache_dir` these executables are persisted as well and later
+        processes load them instead of recompiling. The runner's shape
+        constants are baked into the HLO and therefore covered by the cache key.
+        """
 
-        Returns:
-            jax.Array: Slot mapping array [total_slices, 3]
+        def spec(x) -> jax.ShapeDtypeStruct:
+            return jax.ShapeDtypeStruct(jnp.shape(x), jnp.result_type(x), sharding=self._empty_sharding)
 
-        Note:
-            This function is performance-critical and fully vectorized
-            to avoid Python loops during execution.
-        """
-        s = num_computed_tokens[:num_reqs]
-        e = s + num_scheduled_tokens_per_req
-        lps = s // page_size
-        lpe = (e - 1) // page_size
-        page_lens = lpe - lps + 1
-        total_pages = int(jnp.sum(page_lens))
-        if total_pages == 0:
-            return jnp.zeros((0, 3), dtype=jnp.int32)
-
-        req_ids = jnp.repeat(jnp.arange(num_reqs, dtype=jnp.int32), page_lens)
-        cum_pages = jnp.cumsum(page_lens)
-        starts = cum_pages - page_lens
-        local_page_offsets = jnp.arange(total_pages, dtype=jnp.int32) - jnp.repeat(starts, page_lens)
-        local_starts_rep = lps[req_ids]
-        global_page_indices = req_ids * max_num_pages_per_req + local_starts_rep + local_page_offsets
-        page_numbers = page_table_flat[global_page_indices]
-        s_mod = s % page_size
-        e_mod = ((e - 1) % page_size) + 1
-        s_mod_rep = s_mod[req_ids]
-        e_mod_rep = e_mod[req_ids]
-        lens_rep = page_lens[req_ids]
-
-        is_first = local_page_offsets == 0
-        is_last = local_page_offsets == (lens_rep - 1)
-
-        kv_local_st = jnp.where(is_first, s_mod_rep, jnp.int32(0))
-        kv_local_en = jnp.where(is_last, e_mod_rep, jnp.int32(page_size))
-        slice_lens = kv_local_en - kv_local_st
-        kv_cache_start = kv_local_st + page_numbers * page_size
-        new_kv_start = jnp.cumsum(jnp.pad(slice_lens[:-1], (1, 0)), dtype=jnp.int32)
-
-        return jnp.stack([kv_cache_start, new_kv_start, slice_lens], axis=1)
-
-    def _get_slot_mapping_metadata(self, num_reqs: int, num_scheduled_tokens_per_req: jax.Array) -> jax.Array:
-        """Compute metadata mapping slices to KV pages. Returns [total_slices, 3]."""
-        if num_reqs == 1 and int(num_scheduled_tokens_per_req[0]) == 1:
-            num_computed = int(self.sequence_buffer.num_computed_tokens[0])
-            page_idx = num_computed // self.metadata.page_size
-            page_offset = num_computed % self.metadata.page_size
-            page_num = int(self.sequence_buffer.page_table[0].get_array()[0, page_idx])
-            kv_cache_start = page_num * self.metadata.page_size + page_offset
-            result = jnp.array([[kv_cache_start, 0, 1]], dtype=jnp.int32)
-            return result
-
-        seq_page_table = self.sequence_buffer.page_table[0].get_array()
-        page_table_size = num_reqs * self.max_pages_per_req
-        self.page_table_flat_buf = self.page_table_flat_buf.at[:page_table_size].set(
-            seq_page_table[:num_reqs].reshape(-1)[:page_table_size]
+        sequence_args = (
+            spec(self.sequence_buffer.num_computed_tokens),
+            spec(self.sequence_buffer.token_ids),
+            spec(self.sequence_buffer.page_table[0].get_array()),
         )
-        page_table_flat = self.page_table_flat_buf[:page_table_size]
-        result = self._vectorized_slot_mapping(
-            self.sequence_buffer.num_computed_tokens,
-            num_scheduled_tokens_per_req,
-            page_table_flat,
-            num_reqs,
-            self.metadata.page_size,
-            self.metadata.max_num_pages_per_req,
+        buffers = tuple(
+            spec(buf)
+            for buf in (
+                self.input_ids_buf,
+                self.position_ids_buf,
+                self.query_start_loc_buf,
+                self.seq_lens_buf,
+                self.pages_tables_buf,
+                self.slot_mapping_buf,
+            )
         )
-        return result
+        step_meta = jax.ShapeDtypeStruct((self.max_num_reqs + 2,), jnp.int32, sharding=self._empty_sharding)
+
+        self._prepare_decode_inputs_fn.lower(*sequence_args, *buffers).compile()
+        for padded_total in self.num_tokens_paddings:
+            logger.debug(f"Compiling input preparation for {padded_total} tokens")
+            self._prepare_inputs_fn.lower(padded_total, step_meta, *sequence_args, *buffers).compile()
+
+    def _compile_token_updates(self):
+        """AOT-compile the sampled-token output write and token-buffer update.
+
+        Both run every step; warming them here keeps their first compile out of the
+        first decode steps. The write is compiled once per request bucket.
+        """
+
+        def spec(x) -> jax.ShapeDtypeStruct:
+            return jax.ShapeDtypeStruct(jnp.shape(x), jnp.result_type(x), sharding=self._empty_sharding)
+
+        out_buf = spec(self.selected_tokens_buf)
+        offset = jax.ShapeDtypeStruct((), jnp.int32, sharding=self._empty_sharding)
+        for padded_num_reqs in _enumerate_padded_num_reqs(
+            self.max_num_reqs,
+            self.executor_manager.min_input_pad,
+            self.executor_manager.num_reqs_bucket_knee,
+            self.executor_manager.num_reqs_bucket_stride,
+        ):
+            chunk = jax.ShapeDtypeStruct((padded_num_reqs, 1), jnp.int32, sharding=self._empty_sharding)
+            self._write_selected_tokens_fn.lower(out_buf, chunk, offset).compile()
+
+        updates = jax.ShapeDtypeStruct((2, self.max_num_reqs), jnp.int32, sharding=self._empty_sharding)
+        self._update_token_buffers_fn.lower(
+            spec(self.sequence_buffer.token_ids),
+            spec(self.sequence_buffer.num_tokens),
+            out_buf,
+            updates,
+        ).compile()
 
     def _update_states(self, scheduler_output: SchedulerOutput) -> bool:
         """Update internal states based on scheduler output.
@@ -1178,28 +1798,27 @@ class eSurgeRunner:
             - May trigger buffer condensation
         """
         # Remove finished requests
-        if scheduler_output.finished_req_ids:
-            logger.debug(f"Removing {len(scheduler_output.finished_req_ids)} finished requests")
-        for req_id in scheduler_output.finished_req_ids:
+        finished_req_ids = scheduler_output.finished_req_ids
+        if finished_req_ids:
+            logger.debug(f"Removing {len(finished_req_ids)} finished requests")
+        for req_id in finished_req_ids:
             self.requests.pop(req_id, None)
 
+        # Drop finished and unscheduled requests from the buffer in a single pass.
+        # Freed rows go into a min-heap, so new requests reuse the lowest free slot first.
+        num_scheduled_tokens = scheduler_output.num_scheduled_tokens
         removed_req_indices: list[int] = []
-        for req_id in scheduler_output.finished_req_ids:
-            req_index = self.sequence_buffer.remove_request(req_id)
-            if req_index is not None:
-                removed_req_indices.append(req_index)
+        unscheduled_req_ids: list[str] = []
+        for req_id, req_index in list(self.sequence_buffer.req_id_to_index.items()):
+            if req_id in finished_req_ids:
                 logger.debug(f"Removed finished request {req_id} at index {req_index}")
-
-        # Remove unscheduled ones currently in buffer
-        scheduled_req_ids = scheduler_output.num_scheduled_tokens.keys()
-        cached_req_ids = self.sequence_buffer.req_id_to_index.keys()
-        unscheduled_req_ids = cached_req_ids - scheduled_req_ids
-
-        for req_id in unscheduled_req_ids:
-            logger.debug(f"Removing unscheduled request {req_id} from sequence buffer")
-            req_index = self.sequence_buffer.remove_request(req_id)
-            assert req_index is not None
-            removed_req_indices.append(req_index)
+            elif req_id not in num_scheduled_tokens:
+                logger.debug(f"Removing unscheduled request {req_id} from sequence buffer")
+                unscheduled_req_ids.append(req_id)
+            else:
+                continue
+            self.sequence_buffer.remove_request(req_id)
+            heapq.heappush(removed_req_indices, req_index)
 
         # Add new requests
         req_ids_to_add: list[str] = []
@@ -1224,6 +1843,9 @@ class eSurgeRunner:
         req_data = scheduler_output.scheduled_cached_reqs
         if req_data.req_ids:
             logger.debug(f"Updating {len(req_data.req_ids)} cached requests")
+        append_rows: list[int] = []
+        append_page_ids: list[tuple[list[int], ...]] = []
+        append_num_computed: list[int] = []
         for i, req_id in enumerate(req_data.req_ids):
             req_state = self.requests.get(req_id)
             if req_state is None:
@@ -1236,25 +1858,36 @@ class eSurgeRunner:
             req_state.num_computed_tokens = num_computed_tokens
 
             if not resumed_from_preemption:
-                for page_ids, new_ids in zip(req_state.page_ids, new_page_ids, strict=False):
-                    page_ids.extend(new_ids)
+                req_state.append_page_ids(new_page_ids)
             else:
-                req_state.page_ids = new_page_ids
+                req_state.set_page_ids(new_page_ids)
 
             req_index = self.sequence_buffer.req_id_to_index.get(req_id)
             if req_index is None:
                 req_ids_to_add.append(req_id)
                 continue
-            self.sequence_buffer.num_computed_tokens = self.sequence_buffer.num_computed_tokens.at[req_index].set(
-                num_computed_tokens
+            append_rows.append(req_index)
+            append_page_ids.append(new_page_ids)
+            append_num_computed.append(num_computed_tokens)
+        if append_rows:
+            # Rows and values travel in one host->device transfer and land with a single scatter
+            updates = jax.device_put(
+                np.array([append_rows, append_num_computed], dtype=np.int32),
+                self._empty_sharding,
+            )
+            self.sequence_buffer.num_computed_tokens = self.sequence_buffer.num_computed_tokens.at[updates[0]].set(
+                updates[1]
             )
-            self.sequence_buffer.page_table.append_row(new_page_ids, req_index)
+        self.sequence_buffer.page_table.append_rows_batch(append_rows, append_page_ids)
+
+        # Sampling parameters only move when rows are added, removed or condensed
+        if removed_req_indices or req_ids_to_add:
+            self._sampling_metadata_cache.clear()
 
         # Add new or reinsert
-        removed_req_indices = sorted(removed_req_indices, reverse=True)
         for req_id in req_ids_to_add:
             req_state = self.requests[req_id]
-            req_index = removed_req_indices.pop() if removed_req_indices else None
+            req_index = heapq.heappop(removed_req_indices) if removed_req_indices else None
             self.sequence_buffer.add_request(req_state, req_index)
             logger.debug(
                 f"Added request {req_id} to sequence buffer at index {req_index if req_index is not None else 'new'}"
@@ -1262,7 +1895,15 @@ class eSurgeRunner:
 
         if removed_req_indices:
             logger.debug(f"Condensing sequence buffer, removing {len(removed_req_indices)} empty slots")
-            self.sequence_buffer.condense(removed_req_indices)
+            self.sequence_buffer.condense(sorted(removed_req_indices, reverse=True))
+
+        # Scheduled token count per sequence-buffer row, read by every `_prepare_inputs` window this step
+        self.scheduled_tokens_buf.fill(0)
+        req_id_to_index = self.sequence_buffer.req_id_to_index
+        for req_id, num_scheduled in scheduler_output.num_scheduled_tokens.items():
+            req_index = req_id_to_index.get(req_id)
+            if req_index is not None:
+                self.scheduled_tokens_buf[req_index] = num_scheduled
 
         has_changes = len(unscheduled_req_ids) > 0 or len(req_ids_to_add) > 0
         if has_changes:
@@ -1275,55 +1916,70 @@ class eSurgeRunner:
         assert num_reqs_total > 0
         assert start_index < num_reqs_total
 
-        # Collect scheduled counts for the current window (<= num_reqs_max_model_len)
-        scheduled_list: list[int] = []
-        for i in range(start_index, min(num_reqs_total, start_index + self.num_reqs_max_model_len)):
-            rid = self.sequence_buffer.req_ids[i]
-            scheduled_list.append(int(scheduler_output.num_scheduled_tokens.get(rid, 0)) if rid is not None else 0)
-
-        # Trim trailing zeros to define active num_reqs in this window
-        while scheduled_list and scheduled_list[-1] == 0:
-            scheduled_list.pop()
-
-        num_reqs = len(scheduled_list)
+        # Scheduled counts for the current window (<= num_reqs_max_model_len), trailing zeros trimmed
+        window = self.scheduled_tokens_buf[start_index : min(num_reqs_total, start_index + self.num_reqs_max_model_len)]
+        active = np.flatnonzero(window)
+        num_reqs = int(active[-1]) + 1 if active.size else 0
+        scheduled_list = window[:num_reqs]
         end_index = start_index + (num_reqs if num_reqs > 0 else 0)
 
-        # Fixed-size vector for JIT: [max_num_reqs]
-        scheduled_full = jnp.zeros((self.max_num_reqs,), dtype=jnp.int32)
-        if num_reqs > 0:
-            scheduled_full = scheduled_full.at[:num_reqs].set(jnp.array(scheduled_list, dtype=jnp.int32))
+        # Token bucket: smallest padding that fits the scheduled tokens (tiny list, bisect on host)
+        paddings = self.num_tokens_paddings
+        padded_total = paddings[min(bisect.bisect_left(paddings, int(scheduled_list.sum())), len(paddings) - 1)]
+        # Padded sizes are pure functions of host-side values, so nothing is pulled back from the device.
+        padded_num_reqs = _get_padded_num_reqs_with_upper_limit(
+            num_reqs,
+            self.max_num_reqs,
+            self.executor_manager.min_input_pad,
+            self.executor_manager.num_reqs_bucket_knee,
+            self.executor_manager.num_reqs_bucket_stride,
+        )
 
-        (
+        seq_page_table = self.sequence_buffer.page_table[0].get_array()  # [max_num_reqs, max_pages_per_req]
+        buffers = (
             self.input_ids_buf,
             self.position_ids_buf,
             self.query_start_loc_buf,
             self.seq_lens_buf,
             self.pages_tables_buf,
             self.slot_mapping_buf,
-            logits_indices_full,
-            padded_total,
-            padded_num_reqs,
-            num_kv_update_slices,
-            padded_num_slices,
-        ) = self._prepare_inputs_fn(
-            scheduled_full,
-            jnp.int32(num_reqs),
-            self.sequence_buffer.num_computed_tokens,  # [max_num_reqs]
-            self.sequence_buffer.token_ids,  # [max_num_reqs, max_model_len]
-            self.sequence_buffer.page_table[0].get_array(),  # [max_num_reqs, max_pages_per_req]
+        )
+        if num_reqs == 1 and scheduled_list[0] == 1:
+            # Single-request decode: only one token/slot is live, skip the general scans
+            outputs = self._prepare_decode_inputs_fn(
+                self.sequence_buffer.num_computed_tokens,
+                self.sequence_buffer.token_ids,
+                seq_page_table,
+                *buffers,
+            )
+        else:
+            # Scheduled counts and both request counts are assembled on host and sent with a
+            # single transfer instead of three separate device arrays. A fresh host array is used
+            # because device_put may alias it while the dispatch is still in flight.
+            step_meta = np.zeros((self.max_num_reqs + 2,), dtype=np.int32)
+            step_meta[:num_reqs] = scheduled_list
+            step_meta[self.max_num_reqs] = num_reqs
+            step_meta[self.max_num_reqs + 1] = padded_num_reqs
+            outputs = self._prepare_inputs_fn(
+                padded_total,
+                jax.device_put(step_meta, self._empty_sharding),
+                self.sequence_buffer.num_computed_tokens,  # [max_num_reqs]
+                self.sequence_buffer.token_ids,  # [max_num_reqs, max_model_len]
+                seq_page_table,
+                *buffers,
+            )
+        (
             self.input_ids_buf,
             self.position_ids_buf,
             self.query_start_loc_buf,
             self.seq_lens_buf,
             self.pages_tables_buf,
             self.slot_mapping_buf,
-        )
+            logits_indices_full,
+            num_kv_update_slices,
+        ) = outputs
 
-        # Views for model execution
-        padded_total = int(padded_total)
-        padded_num_reqs = int(padded_num_reqs)
-        num_kv_update_slices = int(num_kv_update_slices)
-        padded_num_slices = int(padded_num_slices)
+        padded_num_slices = self._get_padded_num_slices(padded_total)
 
         input_ids_view = self.input_ids_buf[:padded_total]
         position_ids_view = self.position_ids_buf[:padded_total]
@@ -1335,7 +1991,7 @@ class eSurgeRunner:
             context_lens=self.seq_lens_buf[: self.num_reqs_max_model_len],
             query_start_loc=self.query_start_loc_buf[: self.num_reqs_max_model_len + 1],
             num_seqs=jnp.array([num_reqs], dtype=jnp.int32),
-            num_kv_update_slices=jnp.array([num_kv_update_slices], dtype=jnp.int32),
+            num_kv_update_slices=num_kv_update_slices,
             num_slices_per_kv_cache_update_page=self.metadata.num_slices_per_kv_cache_update_page,
             page_size=self.metadata.page_size,
         )
@@ -1377,7 +2033,7 @@ class eSurgeRunner:
             the maximum model length, ensuring all requests are handled
             efficiently without exceeding memory constraints.
         """
-        execution_start_time = time.time()
+        execution_start_time = time.perf_counter()
         logger.debug(f"Starting model execution with {scheduler_output.total_num_scheduled_tokens} scheduled tokens")
 
         logger.debug("Updating internal states based on scheduler output")
@@ -1398,50 +2054,55 @@ class eSurgeRunner:
             )
 
         start_index = 0
-        combined_selected_tokens: list[jax.Array] = []
         batch_count = 0
+        # One monotonic clock read per phase boundary; a window's exec start is its prepare end.
+        prepare_time = exec_time = 0.0
+        window_start = time.perf_counter()
 
         logger.debug(f"Processing {self.sequence_buffer.num_reqs} requests in batches")
         while start_index < self.sequence_buffer.num_reqs:
             batch_count += 1
             logger.debug(f"Batch {batch_count}: Preparing inputs starting from index {start_index}")
-            prepare_start = time.time()
             (
                 cache_metadata,
                 logits_indices,
                 padded_num_reqs,
-                num_reqs,
+                _,
                 end_index,
-                padded_total,
+                _,
             ) = self._prepare_inputs(scheduler_output, start_index)
-            prepare_time = time.time() - prepare_start
+            exec_start = time.perf_counter()
+            prepare_time += exec_start - window_start
 
-            exec_start = time.time()
-            selected_token_ids, logits = self.executor_manager.execute(
+            selected_token_ids, _ = self.executor_manager.execute(
                 self._current_input_ids_view,
                 self._current_position_ids_view,
                 cache_metadata,
                 logits_indices,
-                ModelRunnerSamplingMetadata.from_sequence_buffer(self.sequence_buffer, padded_num_reqs),
+                self._get_sampling_metadata(padded_num_reqs),
                 padded_num_reqs,
             )
-            selected_token_ids = selected_token_ids[:num_reqs]
-            exec_time = time.time() - exec_start
-            combined_selected_tokens.append(selected_token_ids)
+            # Padded rows land past `end_index` and are overwritten by the next window.
+            self.selected_tokens_buf = self._write_selected_tokens_fn(
+                self.selected_tokens_buf,
+                selected_token_ids,
+                np.int32(start_index),
+            )
 
             start_index = end_index
+            window_start = time.perf_counter()
+            exec_time += window_start - exec_start
 
-        selected_token_ids = jnp.concatenate(combined_selected_tokens, axis=0)
-        logger.debug(f"Processed {batch_count} batches, generated {selected_token_ids.shape[0]} tokens")
+        logger.debug(f"Processed {batch_count} batches, generated {self.sequence_buffer.num_reqs} tokens")
 
         logger.debug("Processing sampled tokens and updating buffers")
         result = self._process_sampled_tokens(
-            selected_token_ids,
+            self.selected_tokens_buf,
             scheduler_output,
             execution_start_time,
         )
 
-        total_time = time.time() - execution_start_time
+        total_time = time.perf_counter() - execution_start_time
 
         self.log_it(
             f"Model execution took {exec_time:.3f}s "
@@ -1450,43 +2111,99 @@ class eSurgeRunner:
         )
         return result
 
-    @staticmethod
-    def _update_token_buffers_optimized(
-        token_ids: jax.Array,  # [max_reqs, max_len]
-        num_tokens: jax.Array,  # [max_reqs]
-        update_indices: jax.Array,  # [K]
-        new_token_ids: jax.Array,  # [K] or [K, 1]
-        seq_lens: jax.Array,  # [K]
-    ) -> tuple[jax.Array, jax.Array]:
-        """Vectorized token buffer updates."""
-        new_token_ids = new_token_ids.squeeze(-1) if new_token_ids.ndim == 2 else new_token_ids
-        token_ids = token_ids.at[(update_indices, seq_lens)].set(new_token_ids)
-        num_tokens = num_tokens.at[update_indices].add(1)
-        return token_ids, num_tokens
+    def _get_sampling_metadata(self, padded_num_reqs: int) -> ModelRunnerSamplingMetadata:
+        """Return the sampling metadata for a request bucket, reusing it across steps."""
+        sampling_metadata = self._sampling_metadata_cache.get(padded_num_reqs)
+        if sampling_metadata is None:
+            sampling_metadata = ModelRunnerSamplingMetadata.from_sequence_buffer(self.sequence_buffer, padded_num_reqs)
+            self._sampling_metadata_cache[padded_num_reqs] = sampling_metadata
+        return sampling_metadata
+
+    def get_write_selected_tokens_fn(self):
+        """Write one window's sampled tokens into the preallocated output buffer.
+
+        Input and output shardings are pinned to the same spec so the donated
+        buffer is always aliased to the result instead of copied.
+        """
+
+        @ejit(
+            donate_argnums=(0,),
+            in_shardings=(self._empty_sharding, self._empty_sharding, self._empty_sharding),
+            out_shardings=self._empty_sharding,
+        )
+        def _fn(out: jax.Array, chunk: jax.Array, offset: jax.Array) -> jax.Array:
+            return jax.lax.dynamic_update_slice(out, chunk, (offset, 0))
+
+        return _fn
+
+    def get_update_token_buffers_fn(self):
+        """Vectorized token buffer updates.
+
+        The new tokens are gathered from `sampled_tokens` on device so the update
+        does not wait on the host copy. Padded rows are distinct and out of range,
+        so the rows stay sorted and unique and the scatters drop the padding.
+        `token_ids`/`num_tokens` are donated with matching in/out shardings, so the
+        update happens in place.
+        """
+
+        @ejit(
+            donate_argnums=(0, 1),
+            in_shardings=(
+                self._empty_sharding,  # token_ids [max_reqs, max_len]
+                self._empty_sharding,  # num_tokens [max_reqs]
+                self._empty_sharding,  # sampled_tokens [N, 1] with N >= max_reqs
+                self._empty_sharding,  # updates [2, max_reqs] rows / seq_lens, strictly increasing rows
+            ),
+            out_shardings=(self._empty_sharding, self._empty_sharding),
+        )
+        def _fn(
+            token_ids: jax.Array,
+            num_tokens: jax.Array,
+            sampled_tokens: jax.Array,
+            updates: jax.Array,
+        ) -> tuple[jax.Array, jax.Array]:
+            update_indices, seq_lens = updates[0], updates[1]
+            new_token_ids = sampled_tokens[:, 0].at[update_indices].get(mode="fill", fill_value=0)
+            token_ids = token_ids.at[(update_indices, seq_lens)].set(
+                new_token_ids,
+                indices_are_sorted=True,
+                unique_indices=True,
+                mode="drop",
+            )
+            num_tokens = num_tokens.at[update_indices].add(1, indices_are_sorted=True, unique_indices=True, mode="drop")
+            return token_ids, num_tokens
+
+        return _fn
 
     def _process_sampled_tokens(
         self,
-        selected_token_ids: jax.Array,  # [num_reqs, 1] typically
+        selected_token_ids: jax.Array,  # [>= num_reqs, 1] typically
         scheduler_output: SchedulerOutput,
         execution_start_time: float,
     ) -> ModelRunnerOutput:
-        """Process sampled tokens and update buffers."""
+        """Process sampled tokens and update buffers.
+
+        `selected_token_ids` may carry rows past `num_reqs`; they are ignored.
+        """
         request_seq_lens: list[tuple[int, CachedRequestState, int]] = []
         discard_sampled_tokens_req_indices: list[int] = []
         num_reqs = self.sequence_buffer.num_reqs
-        logger.debug(f"Processing {selected_token_ids.shape[0]} sampled tokens for {num_reqs} requests")
+        logger.debug(f"Processing sampled tokens for {num_reqs} requests")
 
-        for i, req_id in enumerate(self.sequence_buffer.req_ids[:num_reqs]):
+        req_ids = cast(list[str], self.sequence_buffer.req_ids[:num_reqs])
+        requests = self.requests
+        # Only rows with scheduled tokens can sample; `scheduled_tokens_buf` was filled in `_update_states`.
+        scheduled = self.scheduled_tokens_buf[:num_reqs]
+        active_rows = np.flatnonzero(scheduled)
+        for i, scheduled_tokens in zip(active_rows.tolist(), scheduled[active_rows].tolist(), strict=True):
+            req_id = req_ids[i]
             if req_id is None:
                 logger.warning(f"Null request ID at index {i} during token processing")
                 continue
-            req_state = self.requests.get(req_id)
+            req_state = requests.get(req_id)
             if req_state is None:
                 logger.error(f"Request {req_id} not found in requests dict during token processing")
                 continue
-            scheduled_tokens = scheduler_output.num_scheduled_tokens.get(req_id, 0)
-            if scheduled_tokens == 0:
-                continue
             seq_len = req_state.num_computed_tokens + scheduled_tokens
 
             # If scheduled token extends past current num_tokens, we accept it; else discard.
@@ -1495,7 +2212,6 @@ class eSurgeRunner:
             else:
                 discard_sampled_tokens_req_indices.append(i)
 
-        req_ids = cast(list[str], self.sequence_buffer.req_ids[:num_reqs])
         prompt_logprobs_dict: dict[str, LogprobsTensors | None] = {req_id: None for req_id in req_ids}
 
         max_gen_len = int(selected_token_ids.shape[-1])
@@ -1503,47 +2219,62 @@ class eSurgeRunner:
         if max_gen_len == 1:
             # Vectorized path (typical decoding)
             logger.debug("Using vectorized path for single-token generation")
-            sampled_flat = selected_token_ids.squeeze(-1)  # [num_reqs]
-            # Discard indices: just don't update buffer, and clear returned list entry
-            update_rows: list[int] = []
-            update_tokens: list[int] = []
-            update_seq_lens: list[int] = []
-
-            valid_sampled_token_ids = [[int(sampled_flat[i])] for i in range(num_reqs)]
-            for idx in discard_sampled_tokens_req_indices:
-                valid_sampled_token_ids[idx].clear()
-
-            for i, req_state, seq_len in request_seq_lens:
-                token_id = int(sampled_flat[i])
-                update_rows.append(i)
-                update_tokens.append(token_id)
-                update_seq_lens.append(seq_len)
-                req_state.output_token_ids.append(token_id)
-
-            if update_rows:
-                rows = jnp.array(update_rows, dtype=jnp.int32)
-                toks = jnp.array(update_tokens, dtype=jnp.int32)
-                lens = jnp.array(update_seq_lens, dtype=jnp.int32)
-                self.sequence_buffer.token_ids, self.sequence_buffer.num_tokens = self._update_token_buffers_optimized(
-                    self.sequence_buffer.token_ids, self.sequence_buffer.num_tokens, rows, toks, lens
+            # The buffer update reads tokens on device, so it is dispatched before the host copy below.
+            if request_seq_lens:
+                # Rows/lengths are known on host and rows are ascending; padding rows are distinct
+                # indices past the buffer, which keeps them sorted and unique, and are dropped.
+                updates = np.empty((2, self.max_num_reqs), dtype=np.int32)
+                updates[0] = np.arange(self.max_num_reqs, 2 * self.max_num_reqs, dtype=np.int32)
+                updates[1] = 0
+                for j, (i, _, seq_len) in enumerate(request_seq_lens):
+                    updates[0, j] = i
+                    updates[1, j] = seq_len
+                self.sequence_buffer.token_ids, self.sequence_buffer.num_tokens = self._update_token_buffers_fn(
+                    self.sequence_buffer.token_ids,
+                    self.sequence_buffer.num_tokens,
+                    selected_token_ids,
+                    jax.device_put(updates, self._empty_sharding),
                 )
 
+            if len(discard_sampled_tokens_req_indices) == num_reqs:
+                # Every row is a partial prefill chunk: nothing is returned, so skip the host sync
+                # and let the device keep running ahead of the next step.
+                valid_sampled_token_ids = [[] for _ in range(num_reqs)]
+            else:
+                sampled_flat = np.asarray(jax.device_get(selected_token_ids))[:num_reqs, 0]
+                # Discard indices: just don't update buffer, and clear returned list entry
+                valid_sampled_token_ids = [[token_id] for token_id in sampled_flat.tolist()]
+                for idx in discard_sampled_tokens_req_indices:
+                    valid_sampled_token_ids[idx].clear()
+
+            for i, req_state, _ in request_seq_lens:
+                req_state.output_token_ids.append(valid_sampled_token_ids[i][0])
+
         else:
-            # Rare ragged multi-token case (keep original logic)
+            # Rare ragged multi-token case
             logger.debug(f"Using ragged path for multi-token generation (max_gen_len={max_gen_len})")
-            valid_mask = selected_token_ids != -1
-            gen_lens = valid_mask.sum(axis=1).tolist()
-            valid_sampled_token_ids = [seq.tolist() for seq in selected_token_ids[valid_mask].split(gen_lens)]
-            self.sequence_buffer.num_tokens = self.sequence_buffer.num_tokens.at[:num_reqs].add(jnp.array(gen_lens))
-
-            for i, req_state, seq_len in request_seq_lens:
-                if i >= len(gen_lens):
-                    logger.error(f"Index {i} out of bounds for gen_lens (size={len(gen_lens)})")
-                    continue
-                target_slice = slice(seq_len - gen_lens[i] + 1, seq_len + 1)
-                self.sequence_buffer.token_ids = self.sequence_buffer.token_ids.at[i, target_slice].set(
-                    jnp.array(valid_sampled_token_ids[i], dtype=jnp.int32)
+            sampled_np = np.asarray(jax.device_get(selected_token_ids))[:num_reqs]
+            valid_np = sampled_np != -1
+            gen_lens = valid_np.sum(axis=1)
+            valid_sampled_token_ids = [row[mask].tolist() for row, mask in zip(sampled_np, valid_np, strict=True)]
+            self.sequence_buffer.num_tokens = self.sequence_buffer.num_tokens.at[:num_reqs].add(jnp.asarray(gen_lens))
+
+            if request_seq_lens:
+                # One predicated scatter for all accepted rows: each valid token goes to its slot after the
+                # row's previous length, invalid entries get an out-of-range column and are dropped.
+                rows = np.array([i for i, _, _ in request_seq_lens], dtype=np.int32)
+                seq_lens = np.array([seq_len for _, _, seq_len in request_seq_lens], dtype=np.int32)
+                starts = seq_lens - gen_lens[rows] + 1
+                cols = np.where(
+                    valid_np[rows],
+                    starts[:, None] + np.cumsum(valid_np[rows], axis=1) - 1,
+                    self.max_model_len,
+                ).astype(np.int32)
+                self.sequence_buffer.token_ids = self.sequence_buffer.token_ids.at[rows[:, None], cols].set(
+                    sampled_np[rows], mode="drop"
                 )
+
+            for i, req_state, _ in request_seq_lens:
                 req_state.output_token_ids.extend(valid_sampled_token_ids[i])
 
         # Log runner metrics
@@ -1551,7 +2282,7 @@ class eSurgeRunner:
         if metrics_collector:
             logger.debug("Recording metrics to metrics collector")
             metrics_collector.record_runner_metrics(
-                execution_time=time.time() - execution_start_time,
+                execution_time=time.perf_counter() - execution_start_time,
                 batch_size=num_reqs,
                 num_tokens=scheduler_output.total_num_scheduled_tokens,
             )
@@ -82,6 +82,7 @@ class SequenceBuffer:
         max_num_batched_tokens: int,
         vocab_size: int,
         page_sizes: list[int],
+        sampling_dtype: jnp.dtype = jnp.float32,
     ):
         """Initialize SequenceBuffer.
 
@@ -91,11 +92,14 @@ class SequenceBuffer:
             max_num_batched_tokens: Maximum tokens per batch.
             vocab_size: Size of vocabulary.
             page_sizes: List of page sizes for multi-group caching.
+            sampling_dtype: Dtype of the temperature/top_p arrays, matching the dtype
+                the sampler consumes them in.
         """
         self.max_num_reqs = max_num_reqs
         self.max_model_len = max_model_len
         self.max_num_batched_tokens = max_num_batched_tokens
         self.vocab_size = vocab_size
+        self.sampling_dtype = sampling_dtype
 
         self._req_ids: list[str | None] = []
         self.req_id_to_index: dict[str, int] = {}
@@ -120,8 +124,8 @@ class SequenceBuffer:
 
     def _init_sampling_arrays(self):
         """Initialize sampling parameter arrays with appropriate dtypes."""
-        self.temperature = jnp.full(self.max_num_reqs, -1.0, dtype=jnp.float32)
-        self.top_p = jnp.ones(self.max_num_reqs, dtype=jnp.float32)
+        self.temperature = jnp.full(self.max_num_reqs, -1.0, dtype=self.sampling_dtype)
+        self.top_p = jnp.ones(self.max_num_reqs, dtype=self.sampling_dtype)
         self.top_k = jnp.full(self.max_num_reqs, self.vocab_size, dtype=jnp.int32)
         self.min_p = jnp.zeros(self.max_num_reqs, dtype=jnp.float32)
         self.frequency_penalties = jnp.zeros(self.max_num_reqs, dtype=jnp.float32)
@@ -658,9 +662,9 @@ class ModelRunnerSamplingMetadata:
 
         if sequence_buffer.all_greedy is True and not generate_params_if_all_greedy:
             return cls(
-                temperature=jnp.zeros((padded_num_reqs,), dtype=jnp.float32),
+                temperature=jnp.zeros((padded_num_reqs,), dtype=sequence_buffer.sampling_dtype),
                 min_p=jnp.zeros((padded_num_reqs,), dtype=jnp.float32),
-                top_p=jnp.zeros((padded_num_reqs,), dtype=jnp.float32),
+                top_p=jnp.zeros((padded_num_reqs,), dtype=sequence_buffer.sampling_dtype),
                 top_k=jnp.zeros((padded_num_reqs,), dtype=jnp.int32),
             )
 
@@ -670,8 +674,8 @@ class ModelRunnerSamplingMetadata:
             return arr.at[num_reqs:padded_num_reqs].set(fill_val)[:padded_num_reqs]
 
         return cls(
-            temperature=fill_slice(sequence_buffer.temperature, -1.0).astype(jnp.float32),
+            temperature=fill_slice(sequence_buffer.temperature, -1.0),
             min_p=fill_slice(sequence_buffer.min_p, 0.0).astype(jnp.float32),
-            top_p=fill_slice(sequence_buffer.top_p, 1.0).astype(jnp.float32),
+            top_p=fill_slice(sequence_buffer.top_p, 1.0),
             top_k=fill_slice(sequence_buffer.top_k, 0).astype(jnp.int32),
         )
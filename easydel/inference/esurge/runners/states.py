@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import jax
+import numpy as np
 from eformer.pytree import auto_pytree
 
 from ...sampling_params import SamplingParams
@@ -26,13 +27,25 @@ class CachedRequestState:
     prompt_token_ids: list[int]
     sampling_params: SamplingParams
     generator: jax.random.PRNGKey
-    page_ids: tuple[list[int], ...]
+    page_ids: tuple[np.ndarray, ...]
     num_computed_tokens: int
     output_token_ids: list[int]
     num_prompt_tokens: int = -1
 
     def __post_init__(self):
         self.num_prompt_tokens = len(self.prompt_token_ids)
+        self.set_page_ids(self.page_ids)
+
+    def set_page_ids(self, page_ids: tuple[list[int], ...]) -> None:
+        """Replace the page IDs, storing each KV-cache group as a contiguous int32 array."""
+        self.page_ids = tuple(np.asarray(ids, dtype=np.int32) for ids in page_ids)
+
+    def append_page_ids(self, new_page_ids: tuple[list[int], ...]) -> None:
+        """Extend each KV-cache group with newly allocated page IDs."""
+        self.page_ids = tuple(
+            np.concatenate([ids, np.asarray(new_ids, dtype=np.int32)]) if len(new_ids) else ids
+            for ids, new_ids in zip(self.page_ids, new_page_ids, strict=False)
+        )
 
     @property
     def num_tokens(self) -> int:
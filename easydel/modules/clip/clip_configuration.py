@@ -23,6 +23,28 @@ from easydel.utils.helpers import get_logger
 logger = get_logger(__name__)
 
 
+# Rule patterns are static; only resolving the strategies depends on the config's partition manager.
+_PARTITION_RULE_PATTERNS: tuple[tuple[str, typing.Any], ...] = (
+    # Encoder layers hold nearly all parameters, so their rules are tried first.
+    (r"(text|vision)_model/encoder/layers/\d+/self_attn/(q_proj|k_proj|v_proj)/kernel", ColumnWise),
+    (r"(text|vision)_model/encoder/layers/\d+/self_attn/out_proj/kernel", RowWise),
+    (r"(text|vision)_model/encoder/layers/\d+/mlp/fc1/kernel", ColumnWise),
+    (r"(text|vision)_model/encoder/layers/\d+/mlp/fc2/kernel", RowWise),
+    # Embeddings
+    (r"text_model/embeddings/token_embedding/embedding", ColumnWise),
+    (r"(text|vision)_model/embeddings/position_embedding/embedding", ColumnWise),
+    (r"vision_model/embeddings/class_embedding", Replicated),
+    (r"vision_model/embeddings/patch_embedding/kernel", ColumnWise),
+    # Heads
+    (r"(visual|text)_projection/kernel", ColumnWise),
+    (r"logit_scale", Replicated),
+    (r"classifier/kernel", RowWise),
+    # Everything else, including every LayerNorm parameter and every bias (attention, mlp,
+    # patch embedding, projections, classifier), is replicated.
+    (r".*", Replicated),
+)
+
+
 def _get_partition_rules(self, *arg, **kwargs):
     """Generic partition rules for CLIP text and vision models.
 
@@ -35,45 +57,10 @@ def _get_partition_rules(self, *arg, **kwargs):
             Tuple: A tuple of partition rules for model parameters.
     """
     pmag = self.partition_manager  # Handles resolving strategies
-    return (
-        # 1. Text Embeddings
-        (r"text_model/embeddings/token_embedding/embedding", pmag.resolve(ColumnWise)),
-        (r"text_model/embeddings/position_embedding/embedding", pmag.resolve(ColumnWise)),
-        (r"vision_model/embeddings/class_embedding", pmag.resolve(Replicated)),
-        (r"vision_model/embeddings/patch_embedding/kernel", pmag.resolve(ColumnWise)),
-        (r"vision_model/embeddings/patch_embedding/bias", pmag.resolve(Replicated)),
-        (r"vision_model/embeddings/position_embedding/embedding", pmag.resolve(ColumnWise)),
-        (
-            r"(text|vision)_model/encoder/layers/\d+/self_attn/(q_proj|k_proj|v_proj)/kernel",
-            pmag.resolve(ColumnWise),
-        ),
-        (
-            r"(text|vision)_model/encoder/layers/\d+/self_attn/out_proj/kernel",
-            pmag.resolve(RowWise),
-        ),
-        (
-            r"(text|vision)_model/encoder/layers/\d+/self_attn/.*proj/bias",
-            pmag.resolve(Replicated),
-        ),
-        (
-            r"(text|vision)_model/encoder/layers/\d+/mlp/fc1/kernel",
-            pmag.resolve(ColumnWise),
-        ),
-        (r"(text|vision)_model/encoder/layers/\d+/mlp/fc2/kernel", pmag.resolve(RowWise)),
-        (
-            r"(text|vision)_model/encoder/layers/\d+/mlp/fc(1|2)/bias",
-            pmag.resolve(Replicated),
-        ),
-        (r".*norm.*/scale", pmag.resolve(Replicated)),
-        (r".*norm.*/bias", pmag.resolve(Replicated)),
-        (r"(visual|text)_projection/kernel", pmag.resolve(ColumnWise)),
-        (r"(visual|text)_projection/bias", pmag.resolve(Replicated)),
-        (r"logit_scale", pmag.resolve(Replicated)),
-        (r"classifier/kernel", pmag.resolve(RowWise)),
-        (r"classifier/bias", pmag.resolve(Replicated)),
-        (r".*bias", pmag.resolve(Replicated)),
-        (r".*", pmag.resolve(Replicated)),
-    )
+    # Only three distinct strategies appear in the table; resolve each of them once.
+    # Keyed by identity since the strategy markers need not be hashable.
+    resolved = {id(strategy): pmag.resolve(strategy) for strategy in (ColumnWise, RowWise, Replicated)}
+    return tuple((pattern, resolved[id(strategy)]) for pattern, strategy in _PARTITION_RULE_PATTERNS)
 
 
 @register_config("clip_text_model")
@@ -290,10 +277,11 @@ class CLIPConfig(EasyDeLBaseConfig):
     documentation from [`EasyDeLBaseConfig`] for more information.
 
     Args:
-            text_config (`dict`, *optional*):
-                    Dictionary of configuration options used to initialize [`CLIPTextConfig`].
-            vision_config (`dict`, *optional*):
-                    Dictionary of configuration options used to initialize [`CLIPVisionConfig`].
+            text_config (`dict` or [`CLIPTextConfig`], *optional*):
+                    Dictionary of configuration options used to initialize [`CLIPTextConfig`], or an instance used as is.
+            vision_config (`dict` or [`CLIPVisionConfig`], *optional*):
+                    Dictionary of configuration options used to initialize [`CLIPVisionConfig`], or an instance used
+                    as is.
             projection_dim (`int`, *optional*, defaults to 512):
                     Dimensionality of text and vision projection layers.
             logit_scale_init_value (`float`, *optional*, defaults to 2.6592):
@@ -342,13 +330,34 @@ class CLIPConfig(EasyDeLBaseConfig):
 
         super().__init__(**kwargs)
 
+        # Sub-configs already built from `*_config_dict`, reused below when the merge adds nothing to them.
+        text_config_obj = None
+        vision_config_obj = None
+
+        # Sub-config instances are used as given, unless they have to be merged with a `*_config_dict`.
+        if isinstance(text_config, CLIPTextConfig):
+            if text_config_dict is None:
+                text_config_obj = text_config
+            else:
+                text_config = text_config.to_dict()
+        if isinstance(vision_config, CLIPVisionConfig):
+            if vision_config_dict is None:
+                vision_config_obj = vision_config
+            else:
+                vision_config = vision_config.to_dict()
+
         if text_config_dict is not None:
             if text_config is None:
                 text_config = {}
 
-            _text_config_dict = CLIPTextConfig(**text_config_dict).to_dict()
-            for key, value in _text_config_dict.items():
-                if key in text_config and value != text_config[key] and key not in ["transformers_version"]:
+            text_config_obj = CLIPTextConfig(**text_config_dict)
+            _text_config_dict = text_config_obj.to_dict()
+            if text_config.keys() - _text_config_dict.keys():
+                text_config_obj = None
+
+            # Only keys present on both sides can conflict.
+            for key in _text_config_dict.keys() & text_config.keys():
+                if _text_config_dict[key] != text_config[key] and key not in ["transformers_version"]:
                     if key in text_config_dict:
                         message = (
                             f"`{key}` is found in both `text_config_dict` and `text_config` but with different values. "
@@ -369,7 +378,11 @@ class CLIPConfig(EasyDeLBaseConfig):
                 vision_config = {}
 
             # This is the complete result when using `vision_config_dict`.
-            _vision_config_dict = CLIPVisionConfig(**vision_config_dict).to_dict()
+            vision_config_obj = CLIPVisionConfig(**vision_config_dict)
+            _vision_config_dict = vision_config_obj.to_dict()
+            if vision_config.keys() - _vision_config_dict.keys():
+                vision_config_obj = None
+
             # convert keys to string instead of integer
             if "id2label" in _vision_config_dict:
                 _vision_config_dict["id2label"] = {
@@ -377,8 +390,8 @@ class CLIPConfig(EasyDeLBaseConfig):
                 }
 
             # Give a warning if the values exist in both `_vision_config_dict` and `vision_config` but being different.
-            for key, value in _vision_config_dict.items():
-                if key in vision_config and value != vision_config[key] and key not in ["transformers_version"]:
+            for key in _vision_config_dict.keys() & vision_config.keys():
+                if _vision_config_dict[key] != vision_config[key] and key not in ["transformers_version"]:
                     # If specified in `vision_config_dict`
                     if key in vision_config_dict:
                         message = (
@@ -404,8 +417,8 @@ class CLIPConfig(EasyDeLBaseConfig):
             vision_config = {}
             logger.info("`vision_config` is `None`. initializing the `CLIPVisionConfig` with default values.")
 
-        self.text_config = CLIPTextConfig(**text_config)
-        self.vision_config = CLIPVisionConfig(**vision_config)
+        self.text_config = text_config_obj if text_config_obj is not None else CLIPTextConfig(**text_config)
+        self.vision_config = vision_config_obj if vision_config_obj is not None else CLIPVisionConfig(**vision_config)
 
         self.projection_dim = projection_dim
         self.logit_scale_init_value = logit_scale_init_value
@@ -426,10 +439,6 @@ class CLIPConfig(EasyDeLBaseConfig):
                 [`CLIPConfig`]: An instance of a configuration object
         """
 
-        return cls(
-            text_config=text_config.to_dict(),
-            vision_config=vision_config.to_dict(),
-            **kwargs,
-        )
+        return cls(text_config=text_config, vision_config=vision_config, **kwargs)
 
     get_partition_rules = _get_partition_rules
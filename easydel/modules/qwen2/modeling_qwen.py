@@ -24,6 +24,7 @@ from flax import nnx as nn
 
 from easydel.infra.base_module import EasyDeLBaseModule
 from easydel.infra.factory import TaskType, register_module
+from easydel.infra.loss_utils import LossConfig, LossMetrics, SpecialLossNormalizingFactor
 from easydel.infra.modeling_outputs import (
     AttentionLayerOutput,
     BaseModelOutput,
@@ -634,6 +635,12 @@ class Qwen2Model(EasyDeLBaseModule):
         )
         if attention_mask is None:
             attention_mask = jnp.ones((batch_size, sequence_length), "b1")
+            if position_ids is None:
+                # cumsum over an all-ones mask is just arange; skip the prefix sum.
+                position_ids = jnp.broadcast_to(
+                    jnp.arange(sequence_length, dtype=jnp.int32),
+                    (batch_size, sequence_length),
+                )
         else:
             if attention_mask.dtype != jnp.bool:
                 attention_mask = jnp.astype(attention_mask == 1, "b1")
@@ -856,6 +863,149 @@ class Qwen2ForCausalLM(EasyDeLBaseModule):
             past_key_values=outputs.past_key_values,
         )
 
+    def compute_loss(
+        self,
+        *,
+        labels: chex.Array | None = None,
+        loss_config: LossConfig | None = None,
+        loss_kwargs: dict | None = None,
+        **batch,
+    ) -> tuple[CausalLMOutput, LossMetrics]:
+        """Computes the causal LM loss, optionally without materializing the full logits.
+
+        When `config.lm_loss_chunk_size` is set, the forward pass skips the LM head and the
+        loss is computed by `compute_chunked_lm_loss` in tiles of that many tokens; the
+        returned outputs then carry no logits. Otherwise this defers to
+        `EasyDeLBaseModule.compute_loss`.
+
+        Args:
+            labels (tp.Optional[chex.Array]): Target token IDs. Defaults to `input_ids` from the batch.
+            loss_config (tp.Optional[LossConfig]): Loss configuration. The chunked path supports
+                `ignore_index` and `shift_tokens` with the default normalization by the number of real
+                target tokens.
+            loss_kwargs (tp.Optional[dict]): Extra arguments for the loss function (default path only).
+            **batch: Model inputs (e.g. `input_ids`, `attention_mask`).
+
+        Returns:
+            tp.Tuple[CausalLMOutput, LossMetrics]: The model outputs with `loss` set, and the loss metrics.
+
+        Raises:
+            NotImplementedError: If the chunked path is enabled with loss options it does not support.
+        """
+        chunk_size = getattr(self.config, "lm_loss_chunk_size", None)
+        if chunk_size is None:
+            return super().compute_loss(labels=labels, loss_config=loss_config, loss_kwargs=loss_kwargs, **batch)
+
+        if labels is None:
+            labels = batch.get("input_ids", None)
+        assert labels is not None, "`labels` can not be `None` for computing loss."
+        if loss_config is None:
+            loss_config = LossConfig()
+        if (
+            loss_kwargs
+            or loss_config.label_smoothing
+            or loss_config.z_loss
+            or loss_config.reduction is not None
+            or loss_config.divide_weight_sum
+            or loss_config.loss_normalizing_factor
+            not in ("NUM_REAL_TARGET_TOKENS", SpecialLossNormalizingFactor.NUM_REAL_TARGET_TOKENS)
+        ):
+            raise NotImplementedError(
+                "`lm_loss_chunk_size` only supports the default token-averaged cross entropy; "
+                "unset it to use label smoothing, z-loss, custom reductions or normalizations."
+            )
+
+        outputs = self(**{**batch, "apply_lm_head": False})
+        loss_output = self.compute_chunked_lm_loss(
+            outputs.last_hidden_state,
+            labels,
+            attention_mask=batch.get("attention_mask", None),
+            chunk_size=chunk_size,
+            ignore_index=loss_config.ignore_index,
+            shift_tokens=loss_config.shift_tokens,
+        )
+        outputs = outputs.replace(loss=loss_output.loss)
+        return outputs, loss_output
+
+    def compute_chunked_lm_loss(
+        self,
+        hidden_states: chex.Array,
+        labels: chex.Array,
+        attention_mask: chex.Array | None = None,
+        chunk_size: int = 512,
+        ignore_index: int = -100,
+        shift_tokens: bool = True,
+    ) -> LossMetrics:
+        """Computes the causal LM loss without materializing the full logits tensor.
+
+        The LM head (tied or untied, as in `apply_lm_head`) is applied to `chunk_size`
+        tokens at a time inside a `jax.lax.scan`; each step reduces its logits to the
+        log-sum-exp and the label logit, and is rematerialized in the backward pass, so
+        only one `(batch_size, chunk_size, vocab_size)` tile is live at any point.
+
+        Args:
+            hidden_states (chex.Array): Final hidden states, e.g. `last_hidden_state` from a
+                call with `apply_lm_head=False`. Shape: (batch_size, sequence_length, hidden_size).
+            labels (chex.Array): Target token IDs. Shape: (batch_size, sequence_length).
+            attention_mask (tp.Optional[chex.Array]): Mask of tokens that count towards the loss.
+                Shape: (batch_size, sequence_length).
+            chunk_size (int): Number of sequence positions projected to the vocabulary per step.
+            ignore_index (int): Label value excluded from the loss. Defaults to -100.
+            shift_tokens (bool): Whether to predict `labels[:, 1:]` from `hidden_states[:, :-1]`.
+
+        Returns:
+            LossMetrics: Mean negative log-likelihood over the real target tokens, together with
+                the number of those tokens (`weight_sum`) and the token accuracy.
+        """
+        if shift_tokens:
+            hidden_states = hidden_states[:, :-1, :]
+            labels = labels[:, 1:]
+            if attention_mask is not None:
+                attention_mask = attention_mask[:, 1:]
+
+        weights = labels != ignore_index
+        if attention_mask is not None:
+            weights = jnp.logical_and(weights, attention_mask.astype(jnp.bool_))
+
+        batch_size, sequence_length, _ = hidden_states.shape
+        chunk_size = max(1, min(chunk_size, sequence_length))
+        pad = -sequence_length % chunk_size
+        if pad:
+            hidden_states = jnp.pad(hidden_states, ((0, 0), (0, pad), (0, 0)))
+            labels = jnp.pad(labels, ((0, 0), (0, pad)), constant_values=ignore_index)
+            weights = jnp.pad(weights, ((0, 0), (0, pad)))
+        num_chunks = (sequence_length + pad) // chunk_size
+
+        def _to_chunks(x):
+            return jnp.swapaxes(x.reshape(batch_size, num_chunks, chunk_size, *x.shape[2:]), 0, 1)
+
+        @jax.checkpoint
+        def _chunk_loss(carry, chunk):
+            hidden_chunk, label_chunk, weight_chunk = chunk
+            logits = self.apply_lm_head(hidden_chunk).astype(jnp.float32)
+            label_chunk = jnp.where(weight_chunk, label_chunk, 0)
+            label_logits = jnp.take_along_axis(logits, label_chunk[..., None], axis=-1)[..., 0]
+            nll = jax.nn.logsumexp(logits, axis=-1) - label_logits
+            correct = jnp.argmax(logits, axis=-1) == label_chunk
+            total_nll, total_correct = carry
+            return (
+                total_nll + jnp.sum(jnp.where(weight_chunk, nll, 0.0)),
+                total_correct + jnp.sum(jnp.logical_and(correct, weight_chunk)),
+            ), None
+
+        (total_nll, total_correct), _ = jax.lax.scan(
+            _chunk_loss,
+            (jnp.zeros((), jnp.float32), jnp.zeros((), jnp.int32)),
+            (_to_chunks(hidden_states), _to_chunks(labels), _to_chunks(weights)),
+        )
+        weight_sum = jnp.sum(weights)
+        denominator = jnp.maximum(weight_sum, 1).astype(jnp.float32)
+        return LossMetrics(
+            loss=total_nll / denominator,
+            weight_sum=weight_sum,
+            accuracy=total_correct.astype(jnp.float32) / denominator,
+        )
+
     def get_encoder(self):
         """
         Returns the encoder part of the model's graph definition.
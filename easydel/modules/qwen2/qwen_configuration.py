@@ -90,6 +90,9 @@ class Qwen2Config(EasyDeLBaseConfig):
             Whether to use the scan implementation for the layers.
         rope_scaling (`tp.Dict[str, tp.Union[str, float]]`, *optional*):
             The configuration for rope scaling.
+        lm_loss_chunk_size (`int`, *optional*):
+            When set, `Qwen2ForCausalLM.compute_loss` computes the LM loss in tiles of this many tokens
+            instead of materializing the full logits tensor.
     """
 
     model_type: str = "qwen2"
@@ -125,6 +128,7 @@ class Qwen2Config(EasyDeLBaseConfig):
         scan_layers: bool = True,
         layer_types: list[str] | None = None,
         rope_scaling: tp.Mapping[str, str | float] | None = None,
+        lm_loss_chunk_size: int | None = None,
         **kwargs,
     ):
         """Initializes a Qwen2Config object.
@@ -160,6 +164,8 @@ class Qwen2Config(EasyDeLBaseConfig):
             scan_layers (bool, optional): Whether to use scan for transformer layers. Defaults to True.
             rope_scaling (tp.Optional[tp.Mapping[str, str | float]], optional):
                 RoPE scaling configuration. Defaults to None.
+            lm_loss_chunk_size (tp.Optional[int], optional): Token tile size for the chunked LM loss
+                used by `Qwen2ForCausalLM.compute_loss`. Defaults to None (full logits).
             **kwargs: Additional keyword arguments passed to the parent class.
         """
         self.vocab_size = vocab_size
@@ -195,6 +201,7 @@ class Qwen2Config(EasyDeLBaseConfig):
         self.use_scan_mlp = use_scan_mlp
         self.scan_mlp_chunk_size = scan_mlp_chunk_size
         self.bits = bits
+        self.lm_loss_chunk_size = lm_loss_chunk_size
         self.head_dim = hidden_size // num_attention_heads
         self.layer_types = layer_types
         if self.layer_types is None:
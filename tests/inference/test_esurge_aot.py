@@ -0,0 +1,115 @@
+"""Checks that AOT-compiled eSurge executables are reused by real steps."""
+
+import os
+
+os.environ["CUDA_VISIBLE_DEVICES"] = ""
+os.environ["JAX_PLATFORMS"] = "cpu"
+
+import contextlib
+import logging
+import re
+
+import jax
+import pytest
+from flax import nnx as nn
+from jax import numpy as jnp
+
+import easydel as ed
+from easydel.inference.esurge.request import EngineRequest
+from easydel.inference.esurge.runners import eSurgeRunner
+from easydel.inference.esurge.scheduler import Scheduler
+from easydel.inference.sampling_params import SamplingParams
+from easydel.layers.caching import PagesCacheMetaData
+
+_COMPILE_RE = re.compile(r"Finished XLA compilation of (\S+)")
+
+
+class _CompileRecorder(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.names: list[str] = []
+
+    def emit(self, record):
+        match = _COMPILE_RE.search(record.getMessage())
+        if match is not None:
+            self.names.append(match.group(1))
+
+
+@contextlib.contextmanager
+def _record_compiles():
+    recorder = _CompileRecorder()
+    jax_logger = logging.getLogger("jax")
+    jax_logger.addHandler(recorder)
+    try:
+        with jax.log_compiles(True):
+            yield recorder.names
+    finally:
+        jax_logger.removeHandler(recorder)
+
+
+def _make_model():
+    config = ed.Qwen2Config(
+        vocab_size=128,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=64,
+    )
+    config.add_basic_configurations(
+        attn_mechanism="paged_attention",
+        attn_dtype=jnp.float32,
+        kvdtype=jnp.float32,
+    )
+    return ed.Qwen2ForCausalLM(
+        config=config,
+        dtype=jnp.float32,
+        param_dtype=jnp.float32,
+        precision=jax.lax.Precision.HIGHEST,
+        rngs=nn.Rngs(0),
+    )
+
+
+@pytest.mark.parametrize("use_combined_forward", [False, True])
+def test_aot_executables_are_reused_by_execute(monkeypatch, use_combined_forward):
+    """Prefill and decode steps dispatch to the AOT executables without compiling again.
+
+    A recompile here means the abstract placeholders used for lowering (shapes,
+    dtypes or shardings) do not match the live device buffers.
+    """
+    # Host memory stats are unavailable on CPU; keep the KV cache small instead of the 4 GiB fallback.
+    monkeypatch.setattr(PagesCacheMetaData, "_compute_free_hbm", staticmethod(lambda **_: 8 * 2**20))
+    runner = eSurgeRunner(
+        model=_make_model(),
+        page_size=16,
+        max_model_len=64,
+        max_num_seqs=2,
+        min_input_pad=1,
+        use_combined_forward=use_combined_forward,
+        use_aot_forward=True,
+    )
+    runner.compile()
+    scheduler = Scheduler.from_runner(runner, max_num_batched_tokens=64, enable_prefix_caching=False)
+    for idx, prompt_len in enumerate((5, 9)):
+        scheduler.add_request(
+            EngineRequest(
+                request_id=f"req-{idx}",
+                prompt_token_ids=list(range(1, prompt_len + 1)),
+                sampling_params=SamplingParams(max_tokens=3, temperature=0.7, top_p=0.9),
+                eos_token_id=None,
+            )
+        )
+
+    sampled = []
+    with _record_compiles() as compiled:
+        # One prefill step followed by decode steps.
+        for _ in range(3):
+            scheduler_output = scheduler.schedule()
+            model_output = runner.execute_model(scheduler_output)
+            scheduler.update_from_output(scheduler_output, model_output)
+            sampled.extend(model_output.sampled_token_ids)
+
+    assert sampled and all(tokens for tokens in sampled)
+    recompiled = [name for name in compiled if "_fn" in name]
+    assert not recompiled, f"execute recompiled AOT functions: {recompiled}"
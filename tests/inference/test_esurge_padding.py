@@ -0,0 +1,84 @@
+"""Checks that the compiled request buckets are exactly the ones the runner pads to."""
+
+import itertools
+
+import pytest
+
+from easydel.inference.esurge.runners.model_runner import (
+    _check_num_reqs_bucket_knee,
+    _enumerate_padded_num_reqs,
+    _get_padded_num_reqs_with_upper_limit,
+    _reachable_bucket_pairs,
+)
+
+TOKEN_PADDINGS = [8, 16, 24, 40, 48, 64, 128, 256, 512]
+
+VALID_LADDERS = [
+    (upper_limit, min_input_pad, knee, stride)
+    for upper_limit, min_input_pad, knee, stride in itertools.product(
+        [1, 7, 8, 33, 64, 100, 129, 256],
+        [1, 2, 4, 8, 16],
+        [None, 1, 2, 8, 16, 32, 64],
+        [1, 8, 16, 32],
+    )
+    if knee is None or knee >= min_input_pad
+]
+
+
+@pytest.mark.parametrize(
+    ("upper_limit", "min_input_pad", "knee", "stride"),
+    list(
+        itertools.product(
+            [1, 2, 7, 8, 9, 16, 31, 33, 64, 100, 129, 256],
+            [1, 2, 4, 8, 16],
+            [None, 1, 8, 16, 24, 32, 64],
+            [1, 8, 16, 32],
+        )
+    ),
+)
+def test_enumerate_padded_num_reqs_matches_bucketer(upper_limit, min_input_pad, knee, stride):
+    """Every padded count the bucketer can return is enumerated, and nothing else."""
+    expected = sorted(
+        {
+            _get_padded_num_reqs_with_upper_limit(num_reqs, upper_limit, min_input_pad, knee, stride)
+            for num_reqs in range(1, upper_limit + 1)
+        }
+    )
+    assert _enumerate_padded_num_reqs(upper_limit, min_input_pad, knee, stride) == expected
+
+
+@pytest.mark.parametrize(("upper_limit", "min_input_pad", "knee", "stride"), VALID_LADDERS)
+def test_padded_num_reqs_ladder_is_monotonic(upper_limit, min_input_pad, knee, stride):
+    """More requests never pad to a smaller bucket, and every count fits its bucket."""
+    padds = [
+        _get_padded_num_reqs_with_upper_limit(num_reqs, upper_limit, min_input_pad, knee, stride)
+        for num_reqs in range(1, upper_limit + 1)
+    ]
+    assert padds == sorted(padds)
+    assert all(padd >= num_reqs for num_reqs, padd in enumerate(padds, start=1))
+
+
+@pytest.mark.parametrize(("upper_limit", "min_input_pad", "knee", "stride"), VALID_LADDERS)
+def test_reachable_bucket_pairs_cover_every_step(upper_limit, min_input_pad, knee, stride):
+    """Every (token bucket, request bucket) a step can hit is compiled, and nothing unreachable is."""
+    expected = set()
+    for num_reqs in range(1, upper_limit + 1):
+        reqs_padd = _get_padded_num_reqs_with_upper_limit(num_reqs, upper_limit, min_input_pad, knee, stride)
+        # A step schedules at least one token per request, so any token bucket >= num_reqs is possible.
+        expected.update((num_tokens, reqs_padd) for num_tokens in TOKEN_PADDINGS if num_tokens >= num_reqs)
+
+    pairs = _reachable_bucket_pairs(TOKEN_PADDINGS, upper_limit, min_input_pad, knee, stride)
+    assert len(pairs) == len(set(pairs))
+    assert set(pairs) == expected
+
+
+@pytest.mark.parametrize(("knee", "min_input_pad"), [(None, 8), (8, 8), (16, 8), (64, 1)])
+def test_check_num_reqs_bucket_knee_accepts_valid_knees(knee, min_input_pad):
+    _check_num_reqs_bucket_knee(knee, min_input_pad)
+
+
+@pytest.mark.parametrize(("knee", "min_input_pad"), [(40, 8), (24, 8), (0, 1), (4, 8)])
+def test_check_num_reqs_bucket_knee_rejects_invalid_knees(knee, min_input_pad):
+    """Knees that are not powers of 2, or sit below the minimum pad, are rejected."""
+    with pytest.raises(ValueError, match="num_reqs_bucket_knee"):
+        _check_num_reqs_bucket_knee(knee, min_input_pad)
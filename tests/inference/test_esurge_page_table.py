@@ -0,0 +1,70 @@
+"""Checks that batched page-table appends match appending one row at a time."""
+
+import numpy as np
+
+from easydel.inference.esurge.page_table import MultiGroupPageTable, PageTable
+
+
+def _new_page_table():
+    return PageTable(page_size=16, max_num_reqs=6, max_num_pages_per_req=8, max_num_batched_tokens=64)
+
+
+def test_page_table_append_rows_batch_matches_append_row():
+    """Batched append writes the same ids and lengths as per-row appends, including empty rows."""
+    reference = _new_page_table()
+    batched = _new_page_table()
+    # Give some rows existing pages so the appended columns start at different offsets.
+    for table in (reference, batched):
+        table.add_row([1, 2], row_idx=0)
+        table.add_row([3], row_idx=2)
+        table.add_row([4, 5, 6], row_idx=4)
+
+    row_indices = [4, 0, 1, 2, 5]
+    page_ids = [[7], [8, 9, 10], [], [11, 12], []]
+
+    for row_idx, ids in zip(row_indices, page_ids, strict=True):
+        reference.append_row(ids, row_idx)
+    batched.append_rows_batch(row_indices, page_ids)
+
+    np.testing.assert_array_equal(np.asarray(batched.page_table), np.asarray(reference.page_table))
+    np.testing.assert_array_equal(np.asarray(batched.num_pages_per_row), np.asarray(reference.num_pages_per_row))
+
+
+def test_page_table_append_rows_batch_all_empty_is_noop():
+    """A batch where no row receives pages leaves the table untouched."""
+    table = _new_page_table()
+    table.add_row([1, 2], row_idx=3)
+    before_table = np.asarray(table.page_table).copy()
+    before_lens = np.asarray(table.num_pages_per_row).copy()
+
+    table.append_rows_batch([3, 1], [[], []])
+
+    np.testing.assert_array_equal(np.asarray(table.page_table), before_table)
+    np.testing.assert_array_equal(np.asarray(table.num_pages_per_row), before_lens)
+
+
+def test_multi_group_page_table_append_rows_batch_matches_append_row():
+    """Every KV cache group gets the same result as per-row appends."""
+    kwargs = dict(max_num_reqs=4, max_model_len=128, max_num_batched_tokens=64, page_sizes=[16, 32])
+    reference = MultiGroupPageTable(**kwargs)
+    batched = MultiGroupPageTable(**kwargs)
+    for table in (reference, batched):
+        table.add_row(([1, 2], [1]), row_idx=1)
+        table.add_row(([3], []), row_idx=3)
+
+    row_indices = [3, 1, 0]
+    page_ids = [([4, 5], [6]), ([], [7, 8]), ([9], [])]
+
+    for row_idx, ids in zip(row_indices, page_ids, strict=True):
+        reference.append_row(ids, row_idx)
+    batched.append_rows_batch(row_indices, page_ids)
+
+    for group_idx in range(len(kwargs["page_sizes"])):
+        np.testing.assert_array_equal(
+            np.asarray(batched[group_idx].page_table),
+            np.asarray(reference[group_idx].page_table),
+        )
+        np.testing.assert_array_equal(
+            np.asarray(batched[group_idx].num_pages_per_row),
+            np.asarray(reference[group_idx].num_pages_per_row),
+        )
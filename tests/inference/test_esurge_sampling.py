@@ -0,0 +1,50 @@
+"""Checks the dtype the eSurge top-p sampler runs in."""
+
+import jax
+import pytest
+from jax import numpy as jnp
+
+from easydel.inference.esurge.runners.model_runner import _sample_top_p
+from easydel.inference.esurge.runners.sequence_buffer import ModelRunnerSamplingMetadata
+
+NUM_REQS = 3
+VOCAB_SIZE = 32
+
+
+def _sampling_params(dtype):
+    return ModelRunnerSamplingMetadata(
+        temperature=jnp.full((NUM_REQS,), 0.7, dtype),
+        min_p=jnp.zeros((NUM_REQS,), dtype),
+        top_k=jnp.zeros((NUM_REQS,), jnp.int32),
+        top_p=jnp.full((NUM_REQS,), 0.9, dtype),
+    )
+
+
+def _top_k_operand_dtypes(logits, sampling_params, sample_dtype=None):
+    rng_keys = jax.random.split(jax.random.PRNGKey(0), NUM_REQS)
+    jaxpr = jax.make_jaxpr(
+        lambda lg, sp, keys: _sample_top_p(lg, sp, keys, top_p_k=4, sample_dtype=sample_dtype),
+    )(logits, sampling_params, rng_keys)
+    return [eqn.invars[0].aval.dtype for eqn in jaxpr.jaxpr.eqns if eqn.primitive.name == "top_k"]
+
+
+@pytest.mark.parametrize("params_dtype", [jnp.float32, jnp.bfloat16])
+def test_bf16_logits_are_sampled_in_bf16(params_dtype):
+    """float32 sampling params must not promote bf16 logits before the top-k sort."""
+    logits = jnp.zeros((NUM_REQS, VOCAB_SIZE), jnp.bfloat16)
+    assert _top_k_operand_dtypes(logits, _sampling_params(params_dtype)) == [jnp.bfloat16]
+
+
+def test_sample_dtype_overrides_logits_dtype():
+    """An explicit sample_dtype is the dtype the sort runs in, whatever the params dtype."""
+    logits = jnp.zeros((NUM_REQS, VOCAB_SIZE), jnp.float32)
+    dtypes = _top_k_operand_dtypes(logits, _sampling_params(jnp.float32), sample_dtype=jnp.bfloat16)
+    assert dtypes == [jnp.bfloat16]
+
+
+def test_sample_top_p_output_shape():
+    """Only the rows that have logits get a key and a sampled id."""
+    logits = jnp.zeros((NUM_REQS, VOCAB_SIZE), jnp.bfloat16)
+    rng_keys = jax.random.split(jax.random.PRNGKey(0), NUM_REQS + 2)
+    samples = _sample_top_p(logits, _sampling_params(jnp.float32), rng_keys, top_p_k=4)
+    assert samples.shape == (NUM_REQS, 1)
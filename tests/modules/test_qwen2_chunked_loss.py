@@ -0,0 +1,93 @@
+"""Checks that the chunked Qwen2 LM loss matches the full-logits loss."""
+
+import os
+
+os.environ["XLA_FLAGS"] = "--xla_force_host_platform_device_count=8"
+os.environ["CUDA_VISIBLE_DEVICES"] = ""
+os.environ["JAX_PLATFORMS"] = "cpu"
+
+import jax
+import numpy as np
+import pytest
+from flax import nnx as nn
+from jax import numpy as jnp
+
+import easydel as ed
+from easydel.infra.loss_utils import ForCausalLMLoss, LossConfig
+
+IGNORE_INDEX = -100
+# 13 tokens leave 12 shifted targets, which is not a multiple of the chunk size.
+SEQUENCE_LENGTH = 13
+CHUNK_SIZE = 5
+
+
+def _make_model(tie_word_embeddings, lm_loss_chunk_size=None):
+    config = ed.Qwen2Config(
+        vocab_size=128,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=64,
+        tie_word_embeddings=tie_word_embeddings,
+        lm_loss_chunk_size=lm_loss_chunk_size,
+    )
+    config.add_basic_configurations(attn_mechanism="vanilla")
+    return ed.Qwen2ForCausalLM(
+        config=config,
+        dtype=jnp.float32,
+        param_dtype=jnp.float32,
+        precision=jax.lax.Precision.HIGHEST,
+        rngs=nn.Rngs(0),
+    )
+
+
+def _make_batch():
+    input_ids = jax.random.randint(jax.random.PRNGKey(0), (2, SEQUENCE_LENGTH), 0, 128)
+    labels = input_ids.at[0, 3:6].set(IGNORE_INDEX).at[1, -2:].set(IGNORE_INDEX)
+    return input_ids, labels
+
+
+@pytest.mark.parametrize("tie_word_embeddings", [True, False])
+def test_compute_chunked_lm_loss_matches_full_logits(tie_word_embeddings):
+    """Loss and accuracy agree with `ForCausalLMLoss`, including ignored labels."""
+    model = _make_model(tie_word_embeddings)
+    input_ids, labels = _make_batch()
+    with model.config.mesh:
+        outputs = model(input_ids=input_ids)
+        reference = ForCausalLMLoss(
+            logits=outputs.logits,
+            labels=labels,
+            config=LossConfig(ignore_index=IGNORE_INDEX),
+        )
+        hidden = model(input_ids=input_ids, apply_lm_head=False).last_hidden_state
+        chunked = model.compute_chunked_lm_loss(hidden, labels, chunk_size=CHUNK_SIZE, ignore_index=IGNORE_INDEX)
+
+    np.testing.assert_allclose(chunked.loss, reference.loss, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(chunked.accuracy, reference.accuracy, rtol=1e-5, atol=1e-6)
+
+
+def test_compute_loss_uses_chunked_path_when_enabled():
+    """Setting `lm_loss_chunk_size` keeps `compute_loss` results and drops the logits."""
+    baseline = _make_model(tie_word_embeddings=False)
+    chunked = _make_model(tie_word_embeddings=False, lm_loss_chunk_size=CHUNK_SIZE)
+    nn.update(chunked, nn.state(baseline))
+    input_ids, labels = _make_batch()
+    loss_config = LossConfig(ignore_index=IGNORE_INDEX)
+    with baseline.config.mesh:
+        _, reference = baseline.compute_loss(input_ids=input_ids, labels=labels, loss_config=loss_config)
+        outputs, metrics = chunked.compute_loss(input_ids=input_ids, labels=labels, loss_config=loss_config)
+
+    assert outputs.logits is None
+    np.testing.assert_allclose(outputs.loss, reference.loss, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(metrics.loss, reference.loss, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(metrics.accuracy, reference.accuracy, rtol=1e-5, atol=1e-6)
+
+
+def test_compute_loss_chunked_rejects_unsupported_options():
+    """Options the chunked path cannot reproduce raise instead of silently changing the loss."""
+    model = _make_model(tie_word_embeddings=False, lm_loss_chunk_size=CHUNK_SIZE)
+    input_ids, labels = _make_batch()
+    with pytest.raises(NotImplementedError):
+        model.compute_loss(input_ids=input_ids, labels=labels, loss_config=LossConfig(label_smoothing=0.1))